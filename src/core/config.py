@@ -158,6 +158,8 @@ TELEGRAM_BOT_TOKEN = TELEGRAM_SECRET # Use the variable loaded from env
 TELEGRAM_ADMIN_CHAT_ID = APPROVED_CHAT_IDS[0] if APPROVED_CHAT_IDS else None
 TELEGRAM_NOTIFICATION_ENABLED = True # Can be overridden by env var if needed
 TELEGRAM_INLINE_BUTTONS = True
+# Identical notifications sent within this many seconds of each other are dropped
+NOTIFICATION_DEBOUNCE_SECONDS = float(os.getenv("NOTIFICATION_DEBOUNCE_SECONDS", "1.0"))
 
 # Chart integration settings (loaded from environment with defaults)
 ENABLE_CHART_SNAPSHOTS = os.getenv("ENABLE_CHART_SNAPSHOTS", "True").lower() == "true"
@@ -166,6 +168,8 @@ MULTI_COIN_CHARTS_URL_TEMPLATE = os.getenv(
     "MULTI_COIN_CHARTS_URL_TEMPLATE", 
     "https://www.multicoincharts.com/?c={ASSETS}&p=1&s=1#nav"
 )
+# Maximum number of chart screenshots captured/sent at the same time
+CHART_CONCURRENCY = int(os.getenv("CHART_CONCURRENCY", "3"))
 
 # --- REMOVED TradingView specific configs ---
 
@@ -2,7 +2,8 @@
 Position repository interface for position storage.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from decimal import Decimal
+from typing import Dict, List, Optional, Any, Tuple
 
 from .position import Position
 
@@ -53,6 +54,37 @@ class PositionRepository(ABC):
         """
         pass
         
+    async def find_open_by_id_prefix(self, prefix: str) -> List[Position]:
+        """
+        Find open positions whose ID starts with the given prefix.
+        
+        Implementations backed by an index should override this; the default
+        scans all open positions.
+        
+        Args:
+            prefix: Leading characters of the position ID
+            
+        Returns:
+            List of open positions with a matching ID
+        """
+        return [p for p in await self.get_open_positions() if p.id.startswith(prefix)]
+    
+    async def get_realized_pnl_totals(self) -> Dict[str, Tuple[Decimal, int]]:
+        """
+        Get realized profit/loss totals of closed positions per strategy.
+        
+        Implementations that can aggregate in storage should override this;
+        the default loads and sums all closed positions.
+        
+        Returns:
+            Mapping of bot strategy to (realized PnL sum, closed position count)
+        """
+        totals: Dict[str, Tuple[Decimal, int]] = {}
+        for position in await self.get_closed_positions():
+            pnl_sum, count = totals.get(position.bot_strategy, (Decimal("0"), 0))
+            totals[position.bot_strategy] = (pnl_sum + position.get_realized_pnl(), count + 1)
+        return totals
+        
     @abstractmethod
     async def get_closed_positions(self, filters: Optional[Dict[str, Any]] = None) -> List[Position]:
         """
@@ -24,6 +24,10 @@ from ..core.config import POSITIONS_FILE, CLOSED_POSITIONS_FILE, TRADE_OUTCOMES_
 logger = logging.getLogger(__name__)
 
 
+# Number of leading ID characters used to bucket positions in the prefix index
+ID_PREFIX_LENGTH = 8
+
+
 class FilePositionRepository(PositionRepository):
     """
     File-based implementation of the position repository.
@@ -85,7 +89,16 @@ class FilePositionRepository(PositionRepository):
                 ])
         
         self.positions_cache = {}  # In-memory cache of positions
+        # Cached positions bucketed by the first ID_PREFIX_LENGTH characters of their ID
+        self._prefix_index: Dict[str, Dict[str, Position]] = {}
+        # Modification time (ns) of the positions file the cache reflects
+        self._loaded_mtime_ns: Optional[int] = None
+        # Per-strategy (realized PnL, count) of closed positions, valid for the
+        # closed positions file at the recorded modification time
+        self._realized_totals: Optional[Dict[str, Tuple[Decimal, int]]] = None
+        self._realized_totals_mtime_ns: Optional[int] = None
         self._load_positions()  # Load positions from file into cache
+        self._rebuild_prefix_index()
     
     def _ensure_valid_json_file(self, file_path: str) -> None:
         """
@@ -172,6 +185,7 @@ class FilePositionRepository(PositionRepository):
             else:
                 # Add new position
                 self.positions_cache[key].append(position)
+            self._index_position(position)
             
             # Save to file
             await self._save_positions_transactional()
@@ -192,13 +206,11 @@ class FilePositionRepository(PositionRepository):
         Returns:
             Position if found, None otherwise
         """
-        # Search all positions for matching ID
-        for positions in self.positions_cache.values():
-            for position in positions:
-                if position.id == position_id:
-                    return position
-        
-        return None
+        # The prefix index mirrors the cache, so this is two dict lookups
+        bucket = self._prefix_index.get(position_id[:ID_PREFIX_LENGTH])
+        if bucket is None:
+            return None
+        return bucket.get(position_id)
     
     async def get_open_positions(self, filters: Optional[Dict[str, Any]] = None) -> List[Position]:
         """
@@ -226,6 +238,34 @@ class FilePositionRepository(PositionRepository):
         
         return all_positions
     
+    async def find_open_by_id_prefix(self, prefix: str) -> List[Position]:
+        """
+        Find open positions whose ID starts with the given prefix.
+        
+        Prefixes of at least ID_PREFIX_LENGTH characters resolve to a single
+        index bucket; shorter ones only scan the bucket keys.
+        
+        Args:
+            prefix: Leading characters of the position ID
+            
+        Returns:
+            List of open positions with a matching ID
+        """
+        if len(prefix) >= ID_PREFIX_LENGTH:
+            buckets = [self._prefix_index.get(prefix[:ID_PREFIX_LENGTH], {})]
+        else:
+            buckets = [
+                bucket for bucket_key, bucket in self._prefix_index.items()
+                if bucket_key.startswith(prefix)
+            ]
+        
+        return [
+            position
+            for bucket in buckets
+            for position_id, position in bucket.items()
+            if position_id.startswith(prefix) and not position.is_closed
+        ]
+    
     async def get_closed_positions(self, filters: Optional[Dict[str, Any]] = None) -> List[Position]:
         """
         Get all closed positions, optionally filtered.
@@ -273,6 +313,44 @@ class FilePositionRepository(PositionRepository):
         
         return all_closed
     
+    async def get_realized_pnl_totals(self) -> Dict[str, Tuple[Decimal, int]]:
+        """
+        Get realized profit/loss totals of closed positions per strategy.
+        
+        The totals are computed from the closed positions file once and then
+        rolled forward as this process closes positions. They are recomputed
+        only when the file has been written by someone else.
+        
+        Returns:
+            Mapping of bot strategy to (realized PnL sum, closed position count)
+        """
+        current_mtime = self._file_mtime(self.closed_positions_file)
+        if (self._realized_totals is None or current_mtime is None
+                or current_mtime != self._realized_totals_mtime_ns):
+            self._realized_totals = await super().get_realized_pnl_totals()
+            self._realized_totals_mtime_ns = current_mtime
+        
+        return dict(self._realized_totals)
+    
+    def _roll_realized_totals(self, position: Position, previous_mtime: Optional[int], replaced: bool) -> None:
+        """
+        Fold a newly closed position into the cached realized PnL totals.
+        
+        Args:
+            position: Position just written to the closed positions file
+            previous_mtime: Closed positions file mtime before the write
+            replaced: Whether the write replaced an existing closed entry
+        """
+        if (self._realized_totals is None or replaced
+                or previous_mtime is None or previous_mtime != self._realized_totals_mtime_ns):
+            # Can't roll forward safely; recompute on next request
+            self._realized_totals = None
+            return
+        
+        pnl_sum, count = self._realized_totals.get(position.bot_strategy, (Decimal("0"), 0))
+        self._realized_totals[position.bot_strategy] = (pnl_sum + position.get_realized_pnl(), count + 1)
+        self._realized_totals_mtime_ns = self._file_mtime(self.closed_positions_file)
+    
     async def update(self, position: Position) -> None:
         """
         Update an existing position.
@@ -324,6 +402,7 @@ class FilePositionRepository(PositionRepository):
             if index is not None:
                 # Remove position from list
                 del positions[index]
+                self._unindex_position(position_id)
                 position_removed = True
                 
                 # Remove key if list is empty
@@ -345,6 +424,7 @@ class FilePositionRepository(PositionRepository):
                     # We found and removed the position
                     found = True
                     self.positions_cache[cache_key] = filtered_positions
+                    self._unindex_position(position_id)
                     # Remove key if list is now empty
                     if not filtered_positions:
                         del self.positions_cache[cache_key]
@@ -368,11 +448,60 @@ class FilePositionRepository(PositionRepository):
         """
         return f"{position.bot_strategy}_{position.bot_settings}_{position.timeframe}_{position.asset.symbol}"
     
+    def _index_position(self, position: Position) -> None:
+        """
+        Add or replace a position in the ID prefix index.
+        
+        Args:
+            position: Position to index
+        """
+        self._prefix_index.setdefault(position.id[:ID_PREFIX_LENGTH], {})[position.id] = position
+    
+    def _unindex_position(self, position_id: str) -> None:
+        """
+        Remove a position from the ID prefix index.
+        
+        Args:
+            position_id: ID of the position to remove
+        """
+        bucket_key = position_id[:ID_PREFIX_LENGTH]
+        bucket = self._prefix_index.get(bucket_key)
+        if bucket is not None:
+            bucket.pop(position_id, None)
+            if not bucket:
+                del self._prefix_index[bucket_key]
+    
+    def _rebuild_prefix_index(self) -> None:
+        """
+        Rebuild the ID prefix index from the positions cache.
+        """
+        self._prefix_index = {}
+        for positions in self.positions_cache.values():
+            for position in positions:
+                self._index_position(position)
+    
+    def _file_mtime(self, file_path: str) -> Optional[int]:
+        """
+        Get a file's modification time in nanoseconds.
+        
+        Args:
+            file_path: Path of the file
+            
+        Returns:
+            Modification time, or None if the file cannot be stat'ed
+        """
+        try:
+            return os.stat(file_path).st_mtime_ns
+        except OSError:
+            return None
+    
     def _load_positions(self) -> None:
         """
         Load positions from the positions file into the cache.
         """
         self.positions_cache = {}
+        # Taken before reading so a write racing the read triggers another reload
+        self._loaded_mtime_ns = self._file_mtime(self.positions_file)
         
         try:
             if os.path.exists(self.positions_file) and os.path.getsize(self.positions_file) > 0:
@@ -498,6 +627,9 @@ class FilePositionRepository(PositionRepository):
                 logger.error(f"Could not acquire write lock: {str(e)}")
                 # Try the temp file approach as fallback
                 self._save_positions_with_tempfile(data)
+            
+            # The file now mirrors the cache, so our own write doesn't make it stale
+            self._loaded_mtime_ns = self._file_mtime(self.positions_file)
                 
         except Exception as e:
             logger.error(f"Error saving positions: {str(e)}", exc_info=True)
@@ -580,6 +712,7 @@ class FilePositionRepository(PositionRepository):
             logger.info(f"Handling closed position {position.id} - {position.asset.symbol}")
             
             # Save to closed positions file
+            previous_mtime = self._file_mtime(self.closed_positions_file)
             closed_positions = self._load_closed_positions()
             
             key = self._generate_key(position)
@@ -605,6 +738,7 @@ class FilePositionRepository(PositionRepository):
             
             # Save updated closed positions
             self._save_file_transactional(self.closed_positions_file, closed_positions)
+            self._roll_realized_totals(position, previous_mtime, position_already_closed)
             
             # Record trade outcome
             await self._record_trade_outcome(position)
@@ -627,6 +761,7 @@ class FilePositionRepository(PositionRepository):
                     key = self._generate_key(position)
                     if key in self.positions_cache:
                         self.positions_cache[key] = [p for p in self.positions_cache[key] if p.id != position.id]
+                        self._unindex_position(position.id)
                         if not self.positions_cache[key]:
                             del self.positions_cache[key]
                         await self._save_positions_transactional()
@@ -867,6 +1002,25 @@ class FilePositionRepository(PositionRepository):
         
         return position
 
+    async def reload_if_stale(self) -> bool:
+        """
+        Reload positions only if the positions file changed since the last load.
+        
+        The file is shared with other processes (e.g. the API server and the
+        Telegram bot), so staleness is judged by its modification time rather
+        than by local writes alone.
+        
+        Returns:
+            True if positions were reloaded, False if the cache was current
+        """
+        current_mtime = self._file_mtime(self.positions_file)
+        if current_mtime is not None and current_mtime == self._loaded_mtime_ns:
+            logger.debug("Positions file unchanged since last load, skipping reload")
+            return False
+        
+        await self.reload_positions()
+        return True
+    
     async def reload_positions(self) -> None:
         """
         Force reload positions from disk to ensure cache is up-to-date.
@@ -879,6 +1033,7 @@ class FilePositionRepository(PositionRepository):
         self.positions_cache = {}
         # Reload from files
         self._load_positions()
+        self._rebuild_prefix_index()
         logger.debug("Positions reloaded successfully")
         
         # Return early if there's an error loading positions
@@ -1,37 +1,121 @@
 """
 chart_capture.py
 
-Handles capturing screenshots from TradingView charts.
+Handles capturing screenshots from TradingView charts, and the shared,
+cached chart images used by /chart and position notifications.
 """
-import os
 import logging
-from playwright.async_api import async_playwright
-from typing import Optional
+import random
+import time
+from collections import OrderedDict
+from playwright.async_api import async_playwright, Browser, Playwright
+from typing import Dict, Optional, Tuple
 import asyncio
-import uuid
-import tempfile
 
 from ..core.config import (
     ENABLE_CHART_SNAPSHOTS,
+    MULTI_COIN_CHARTS_URL_TEMPLATE,
+    CHART_CONCURRENCY,
 )
 
 logger = logging.getLogger(__name__)
 
+# MultiCoinCharts URL template split around {ASSETS} once, so building a
+# chart URL is plain concatenation rather than a str.format parse
+CHART_URL_TEMPLATE_VALID = bool(MULTI_COIN_CHARTS_URL_TEMPLATE) and '{ASSETS}' in MULTI_COIN_CHARTS_URL_TEMPLATE
+_URL_LEFT, _, _URL_RIGHT = (MULTI_COIN_CHARTS_URL_TEMPLATE or "").partition('{ASSETS}')
+
+# Bounds concurrent chart captures (one browser page each)
+_CAPTURE_SEM = asyncio.Semaphore(CHART_CONCURRENCY)
+
+# Wall-clock limit for each chart capture attempt (30s navigation + 8s render)
+CHART_CAPTURE_TIMEOUT = 40.0  # seconds
+
+# Exponential backoff between chart capture attempts, jittered so concurrent
+# charts don't retry against the site in lockstep
+CHART_RETRY_BACKOFF_BASE = 1.5
+CHART_RETRY_MAX_DELAY = 15.0  # seconds
+CHART_CAPTURE_ATTEMPTS = 2
+
+# Recently prepared chart images, keyed by chart URL, least recently used first
+CHART_CACHE_TTL = 60.0  # seconds
+CHART_CACHE_MAX_ENTRIES = 64
+_chart_cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+# Per-URL capture locks and how many requests hold or wait on each; a lock
+# is dropped with its last user, so this only grows with in-flight charts
+_chart_locks: Dict[str, asyncio.Lock] = {}
+_chart_lock_users: Dict[str, int] = {}
+
+# One headless browser per process, launched on first capture and reused;
+# each capture gets its own short-lived context so pages stay isolated
+_playwright: Optional[Playwright] = None
+_browser: Optional[Browser] = None
+_browser_lock = asyncio.Lock()
+
+
+async def _get_browser() -> Browser:
+    """
+    Get the shared Chromium browser, launching it if needed.
+    
+    A browser that has crashed or disconnected is replaced.
+    
+    Returns:
+        The running browser
+    """
+    global _playwright, _browser
+    async with _browser_lock:
+        if _browser is None or not _browser.is_connected():
+            if _playwright is None:
+                logger.debug("Initializing Playwright for chart capture")
+                _playwright = await async_playwright().start()
+            # Launch with more permissive options to handle server environments
+            _browser = await _playwright.chromium.launch(
+                headless=True,
+                args=[
+                    '--disable-gpu',
+                    '--no-sandbox',
+                    '--disable-dev-shm-usage',
+                    '--disable-setuid-sandbox',
+                ]
+            )
+            logger.info("Chromium browser launched for chart capture")
+        return _browser
+
+
+async def close_chart_browser() -> None:
+    """Close the shared browser and stop Playwright, if they were started."""
+    global _playwright, _browser
+    async with _browser_lock:
+        if _browser is not None:
+            try:
+                await _browser.close()
+                logger.debug("Browser closed successfully")
+            except Exception as close_error:
+                logger.warning(f"Error closing browser: {close_error}")
+            _browser = None
+        if _playwright is not None:
+            try:
+                await _playwright.stop()
+            except Exception as stop_error:
+                logger.warning(f"Error stopping Playwright: {stop_error}")
+            _playwright = None
+
 
 async def capture_chart_screenshot(
     target_url: str, # Now required
-    output_path: Optional[str] = None,
-    # Removed asset_symbol and timeframe parameters
-) -> Optional[str]:
+) -> Optional[bytes]:
     """
     Captures a screenshot of a specific URL (e.g., MultiCoinCharts).
 
+    The screenshot is kept in memory rather than written to a temp file.
+    Captures share one process-wide browser (see _get_browser); callers
+    bound how many run at once.
+
     Args:
         target_url: Specific URL to capture.
-        output_path: Optional path to save the screenshot. If None, uses a temporary file.
 
     Returns:
-        The path to the saved screenshot file, or None if capture failed or is disabled.
+        The PNG screenshot bytes, or None if capture failed or is disabled.
     """
     if not ENABLE_CHART_SNAPSHOTS:
         logger.info("Chart snapshots are disabled.")
@@ -41,137 +125,248 @@ async def capture_chart_screenshot(
          logger.error("Cannot capture screenshot: target_url must be provided.")
          return None
 
-    # Define filename base - always using target_url now
     url_to_capture = target_url
-    filename_base = "multichart_screenshot" 
     logger.info(f"Attempting to capture screenshot from specific URL: {url_to_capture}")
 
-    # --- Removed the fallback logic block that used asset_symbol and TRADINGVIEW_CHART_URLS --- 
+    try:
+        browser = await _get_browser()
+    except Exception as browser_error:
+        logger.error(f"Failed to launch browser: {browser_error}", exc_info=True)
+        return None
+
+    try:
+        # Use more permissive context settings
+        context = await browser.new_context(ignore_https_errors=True)
+    except Exception as context_error:
+        logger.error(f"Failed to create browser context: {context_error}", exc_info=True)
+        return None
 
     try:
-        async with async_playwright() as p:
-            logger.debug("Initializing Playwright for chart capture")
+        page = await context.new_page()
+        logger.debug("Browser page created")
+        
+        # Navigate to the URL with better error handling
+        try:
+            logger.info(f"Navigating to URL: {url_to_capture}")
             
-            try:
-                # Launch with more permissive options to handle server environments
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--disable-gpu',
-                        '--no-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-setuid-sandbox',
-                    ]
-                )
-                logger.debug("Chromium browser launched")
-            except Exception as browser_error:
-                logger.error(f"Failed to launch browser: {browser_error}", exc_info=True)
-                return None
-                
-            try:
-                # Use more permissive context settings
-                context = await browser.new_context(ignore_https_errors=True)
-                page = await context.new_page()
-                logger.debug("Browser page created")
-            except Exception as page_error:
-                logger.error(f"Failed to create browser page: {page_error}", exc_info=True)
-                await browser.close()
-                return None
+            # IMPORTANT CHANGE: Use 'commit' instead of 'load' - this will complete much faster
+            # and doesn't wait for all resources to finish loading
+            response = await page.goto(url_to_capture, timeout=30000, wait_until="commit")
             
-            # Define screenshot path earlier
-            temp_dir = None
-            if output_path is None:
-                temp_dir = tempfile.mkdtemp() 
-                # Make filename unique
-                unique_id = str(uuid.uuid4())[:8] 
-                output_path = os.path.join(temp_dir, f"{filename_base}_{unique_id}.png")
-            
-            # Navigate to the URL with better error handling
-            try:
-                logger.info(f"Navigating to URL: {url_to_capture}")
-                
-                # IMPORTANT CHANGE: Use 'commit' instead of 'load' - this will complete much faster
-                # and doesn't wait for all resources to finish loading
-                response = await page.goto(url_to_capture, timeout=30000, wait_until="commit")
-                
-                if response:
-                    logger.info(f"Initial navigation committed with status: {response.status}")
-                    
-                    # Give the page a moment to render more content after initial commit
-                    logger.info("Waiting 8 seconds for additional content to load...")
-                    await asyncio.sleep(8)
-                else:
-                    logger.warning("No response received from navigation, but continuing...")
-            except Exception as navigation_error:
-                logger.error(f"Failed to navigate to URL {url_to_capture}: {navigation_error}", exc_info=True)
-                await browser.close()
-                # Clean up the temp directory if it was created
-                if temp_dir and os.path.exists(temp_dir):
-                    try:
-                        import shutil
-                        shutil.rmtree(temp_dir)
-                    except Exception as cleanup_err:
-                        logger.warning(f"Error cleaning temp dir after navigation failure: {cleanup_err}")
-                return None
-
-            # Take the screenshot with better error handling
-            try:
-                logger.info(f"Attempting to save screenshot to: {output_path}")
-                # Take a full page screenshot
-                await page.screenshot(path=output_path, full_page=True)
-                logger.info("Screenshot taken successfully")
-            except Exception as screenshot_error:
-                logger.error(f"Error taking screenshot: {screenshot_error}", exc_info=True)
-                await browser.close()
-                # Clean up the temp directory
-                if temp_dir and os.path.exists(temp_dir):
-                    try:
-                        import shutil
-                        shutil.rmtree(temp_dir)
-                    except Exception as cleanup_err:
-                        logger.warning(f"Error cleaning temp dir after screenshot failure: {cleanup_err}")
-                return None
+            if response:
+                logger.info(f"Initial navigation committed with status: {response.status}")
                 
-            # Close the browser
-            try:
-                await browser.close()
-                logger.debug("Browser closed successfully")
-            except Exception as close_error:
-                logger.warning(f"Error closing browser: {close_error}")
-
-            # Check if the file was actually created
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                 logger.info(f"Screenshot saved successfully to {output_path}")
-                 return output_path
+                # Give the page a moment to render more content after initial commit
+                logger.info("Waiting 8 seconds for additional content to load...")
+                await asyncio.sleep(8)
             else:
-                 logger.error(f"Screenshot file was not created or is empty at {output_path}")
-                 # Clean up temp dir if created
-                 if temp_dir and os.path.exists(temp_dir):
-                     try:
-                         os.rmdir(temp_dir) # Only removes if empty
-                     except OSError:
-                         pass # Ignore if not empty
-                 return None
+                logger.warning("No response received from navigation, but continuing...")
+        except Exception as navigation_error:
+            logger.error(f"Failed to navigate to URL {url_to_capture}: {navigation_error}", exc_info=True)
+            return None
+
+        # Take the screenshot with better error handling
+        try:
+            # Take a full page screenshot; without a path Playwright returns the PNG bytes
+            image = await page.screenshot(full_page=True)
+            logger.info("Screenshot taken successfully")
+        except Exception as screenshot_error:
+            logger.error(f"Error taking screenshot: {screenshot_error}", exc_info=True)
+            return None
+
+        if image:
+             logger.info(f"Screenshot captured ({len(image)} bytes)")
+             return image
+        else:
+             logger.error(f"Screenshot was empty for {url_to_capture}")
+             return None
 
     except Exception as e:
         # Log the specific exception
         logger.error(f"Error capturing screenshot from {url_to_capture}: {str(e)}", exc_info=True)
-        # Clean up temp dir if created and exception occurred
-        if 'temp_dir' in locals() and temp_dir and os.path.exists(temp_dir):
-            import shutil
-            try:
-                shutil.rmtree(temp_dir) # Force remove directory and contents
-                logger.info(f"Cleaned up temporary directory {temp_dir} after error.")
-            except Exception as cleanup_err:
-                logger.warning(f"Error cleaning up temporary directory {temp_dir}: {cleanup_err}")
         return None
+    finally:
+        # Closing the context closes its page; the browser stays up for reuse
+        try:
+            await context.close()
+        except Exception as close_error:
+            logger.warning(f"Error closing browser context: {close_error}")
+
+def _build_chart_url(full_symbol: str) -> str:
+    """
+    Build the MultiCoinCharts URL showing one asset in all four chart slots.
+    
+    Args:
+        full_symbol: Exchange-prefixed symbol (e.g. BINANCE:BTCUSDT)
+        
+    Returns:
+        Chart URL
+    """
+    return f"{_URL_LEFT}{full_symbol},{full_symbol},{full_symbol},{full_symbol}{_URL_RIGHT}"
+
+
+def _chart_retry_delay(attempt: int) -> float:
+    """
+    Get the jittered exponential backoff delay before retrying a chart capture.
+    
+    Args:
+        attempt: Number of the attempt that just failed (1-based)
+        
+    Returns:
+        Delay in seconds
+    """
+    return min(CHART_RETRY_MAX_DELAY, CHART_RETRY_BACKOFF_BASE ** attempt) * random.uniform(0.5, 1.5)
+
+
+def _get_cached_chart(target_url: str) -> Optional[bytes]:
+    """
+    Get a prepared chart image captured less than CHART_CACHE_TTL seconds ago.
+    
+    Args:
+        target_url: Chart URL the image was captured from
+        
+    Returns:
+        Image bytes, or None if there is no fresh entry
+    """
+    cached = _chart_cache.get(target_url)
+    if cached and time.monotonic() - cached[0] < CHART_CACHE_TTL:
+        _chart_cache.move_to_end(target_url)
+        return cached[1]
+    return None
+
+
+def _store_cached_chart(target_url: str, image: bytes) -> None:
+    """
+    Cache a prepared chart image, evicting the least recently used beyond the cap.
+    
+    Args:
+        target_url: Chart URL the image was captured from
+        image: Prepared image bytes
+    """
+    _chart_cache[target_url] = (time.monotonic(), image)
+    _chart_cache.move_to_end(target_url)
+    while len(_chart_cache) > CHART_CACHE_MAX_ENTRIES:
+        _chart_cache.popitem(last=False)
+
+
+async def _capture_with_retries(target_url: str, display_name: str) -> Optional[bytes]:
+    """
+    Capture a chart URL, retrying with backoff.
+    
+    Each attempt is limited to CHART_CAPTURE_TIMEOUT, so a hung attempt
+    still leaves time for the retry.
+    
+    Args:
+        target_url: Chart URL to capture
+        display_name: Asset name for log messages
+        
+    Returns:
+        Screenshot bytes, or None if every attempt failed
+    """
+    for capture_attempt in range(1, CHART_CAPTURE_ATTEMPTS + 1):
+        try:
+            screenshot = await asyncio.wait_for(
+                capture_chart_screenshot(target_url=target_url),
+                timeout=CHART_CAPTURE_TIMEOUT
+            )
+            if screenshot:
+                return screenshot
+            logger.warning(f"Screenshot capture failed for {display_name}, attempt {capture_attempt}")
+        except asyncio.TimeoutError:
+            logger.warning(f"Screenshot capture for {display_name} timed out after {CHART_CAPTURE_TIMEOUT}s, attempt {capture_attempt}")
+        except Exception as capture_err:
+            logger.error(f"Error during screenshot capture for {display_name}: {capture_err}", exc_info=True)
+        
+        if capture_attempt < CHART_CAPTURE_ATTEMPTS:
+            logger.info(f"Retrying screenshot capture for {display_name}...")
+            await asyncio.sleep(_chart_retry_delay(capture_attempt))
+    return None
+
+
+async def _load_chart_image(target_url: str, display_name: str) -> Optional[bytes]:
+    """
+    Capture and prepare a chart image, and cache it.
+    
+    Args:
+        target_url: Chart URL to capture
+        display_name: Asset name for log messages
+        
+    Returns:
+        Prepared image bytes (or the raw screenshot if preparation failed),
+        or None if the chart could not be captured
+    """
+    # The timeout clock starts once a slot is acquired, so charts queued
+    # behind others are not penalised for waiting
+    async with _CAPTURE_SEM:
+        screenshot = await _capture_with_retries(target_url, display_name)
+    if not screenshot:
+        return None
+    
+    # PIL is only needed once a chart is actually produced
+    from .image_utils import prepare_chart_image
+    
+    logger.info(f"Preparing screenshot for {display_name}")
+    # PIL work runs in the default executor so concurrent charts aren't blocked
+    prepared = await asyncio.to_thread(
+        prepare_chart_image,
+        image_data=screenshot,
+        top_percent=15.0,
+        bottom_percent=30.0,
+        border_size=2,
+        border_color="black"
+    )
+    if not prepared:
+        logger.warning(f"Image preparation failed for {display_name}, sending original.")
+    image = prepared if prepared else screenshot
+    
+    _store_cached_chart(target_url, image)
+    return image
+
+
+async def get_chart_image(full_symbol: str, display_name: str) -> Optional[bytes]:
+    """
+    Get a prepared MultiCoinCharts image for one asset.
+    
+    Images are reused for CHART_CACHE_TTL seconds, and concurrent requests
+    for the same chart wait on a single capture. At most CHART_CONCURRENCY
+    captures run at once across /chart and notifications.
+    
+    Args:
+        full_symbol: Exchange-prefixed symbol (e.g. BINANCE:BTCUSDT)
+        display_name: Asset name for log messages
+        
+    Returns:
+        Prepared image bytes (or the raw screenshot if preparation failed),
+        or None if the chart could not be captured
+    """
+    if not CHART_URL_TEMPLATE_VALID:
+        logger.warning("MultiCoinCharts URL template is missing or invalid.")
+        return None
+    
+    target_url = _build_chart_url(full_symbol)
+    lock = _chart_locks.get(target_url)
+    if lock is None:
+        lock = _chart_locks[target_url] = asyncio.Lock()
+    _chart_lock_users[target_url] = _chart_lock_users.get(target_url, 0) + 1
+    try:
+        async with lock:
+            image = _get_cached_chart(target_url)
+            if image is not None:
+                logger.info(f"Using cached chart for {display_name}")
+                return image
+            return await _load_chart_image(target_url, display_name)
+    finally:
+        _chart_lock_users[target_url] -= 1
+        if not _chart_lock_users[target_url]:
+            del _chart_lock_users[target_url]
+            del _chart_locks[target_url]
 
 # Example usage (for testing)
 # async def main():
 #     import asyncio
-#     path = await capture_chart_screenshot("BTCUSDT")
-#     if path:
-#         print(f"Screenshot saved at: {path}")
+#     image = await capture_chart_screenshot(target_url="<chart url>")
+#     if image:
+#         print(f"Captured {len(image)} bytes")
 #     else:
 #         print("Failed to capture screenshot.")
 
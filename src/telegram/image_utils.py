@@ -6,32 +6,32 @@ Utilities for image manipulation.
 
 import logging
 import os
+from io import BytesIO
 from PIL import Image, ImageOps
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 def prepare_chart_image(
-    image_path: str, 
+    image_data: bytes, 
     top_percent: float = 15.0,  # Default top crop
     bottom_percent: float = 30.0, # Default bottom crop
     border_size: int = 2,
     border_color: str = "black"
-) -> Optional[str]:
+) -> Optional[bytes]:
     """
     Prepares a chart image by cropping, splitting into 4 quadrants, 
     adding borders to each, and combining them vertically.
 
     Args:
-        image_path: Path to the input image file.
+        image_data: Encoded input image (e.g. PNG screenshot bytes).
         top_percent: Percentage of height to crop from the top initially (0-100).
         bottom_percent: Percentage of height to crop from the bottom initially (0-100).
         border_size: Pixel size of the border to add around each quadrant.
         border_color: Color of the border.
 
     Returns:
-        The path to the modified (prepared) image, or None if processing failed.
-        Note: This function modifies the image in-place.
+        The prepared image as PNG bytes, or None if processing failed.
     """
     # --- 1. Initial Validation --- 
     if top_percent < 0 or top_percent >= 100 or bottom_percent < 0 or bottom_percent >= 100:
@@ -45,8 +45,8 @@ def prepare_chart_image(
         return None
 
     try:
-        logger.info(f"Preparing chart image: {image_path}")
-        with Image.open(image_path) as img:
+        logger.info(f"Preparing chart image ({len(image_data)} bytes)")
+        with Image.open(BytesIO(image_data)) as img:
             original_width, original_height = img.size
             logger.debug(f"Original dimensions: {original_width}x{original_height}")
 
@@ -56,7 +56,7 @@ def prepare_chart_image(
             initial_crop_box = (0, top_pixels, original_width, original_height - bottom_pixels)
             
             if initial_crop_box[1] >= initial_crop_box[3] or initial_crop_box[0] >= initial_crop_box[2]:
-                logger.error(f"Invalid initial crop dimensions for {image_path}. Cannot crop.")
+                logger.error("Invalid initial crop dimensions. Cannot crop.")
                 return None
 
             cropped_img = img.crop(initial_crop_box)
@@ -122,16 +122,13 @@ def prepare_chart_image(
             else:
                  image_to_save = combined_image
 
-            # --- 7. Save Final Image --- 
-            # Overwrite the original file path with the final result
-            image_to_save.save(image_path)
-            logger.info(f"Prepared chart image saved successfully: {image_path}")
+            # --- 7. Encode Final Image --- 
+            output = BytesIO()
+            image_to_save.save(output, format="PNG")
+            logger.info("Prepared chart image successfully")
             
-        return image_path # Return the path to the modified image
+        return output.getvalue()
         
-    except FileNotFoundError:
-        logger.error(f"Image preparation failed: File not found at {image_path}")
-        return None
     except Exception as e:
-        logger.error(f"Error preparing chart image {image_path}: {str(e)}", exc_info=True)
+        logger.error(f"Error preparing chart image: {str(e)}", exc_info=True)
         return None 
\ No newline at end of file
@@ -4,20 +4,24 @@ Main Telegram bot module for the trading bot.
 """
 import os
 import sys
+import signal
 import logging
 import asyncio
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, Tuple, Sequence
 
 from telegram import Update, Bot
 from telegram.constants import ParseMode
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CommandHandler, 
     MessageHandler,
     CallbackQueryHandler,
     ContextTypes,
+    TypeHandler,
     filters
 )
+from telegram.request import HTTPXRequest
 
 # Ensure paths are set up correctly for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -51,7 +55,8 @@ from .telegram_commands import (
     remove_user_command,
     list_users_command,
     stats_command,
-    chart_command
+    chart_command,
+    auth_gate
 )
 
 from .telegram_callbacks import callback_handler
@@ -70,6 +75,39 @@ logging.basicConfig(
     ]
 )
 
+# HTTP client settings for outbound Bot API calls
+BOT_CONNECTION_POOL_SIZE = 64
+BOT_READ_TIMEOUT = 20.0
+# Long-poll duration for getUpdates; its read timeout must outlast this
+POLLING_TIMEOUT = 20
+# Outbound flood-limit shaping (Telegram caps: ~30 msg/s overall, 20 msg/min per group).
+# Applies to every call made through application.bot: command replies, chart
+# photos and NotificationManager sends alike, so callers need no limiter of their own.
+BOT_OVERALL_MAX_RATE = 30
+BOT_OVERALL_TIME_PERIOD = 1
+BOT_GROUP_MAX_RATE = 20
+BOT_GROUP_TIME_PERIOD = 60
+BOT_RATE_LIMIT_MAX_RETRIES = 3
+# Maximum broadcast sends in flight at once (matches the overall rate cap)
+BROADCAST_CONCURRENCY = 30
+
+
+class LegacyUserManager:
+    """
+    Minimal stand-in for the old UserManager interface.
+    
+    Stateless, so a single shared instance is handed out by get_user_manager.
+    """
+    
+    def get_all_users(self):
+        return get_all_users()
+        
+    def get_admin_users(self):
+        return get_admin_users()
+
+
+_LEGACY_USER_MANAGER = LegacyUserManager()
+
 
 class TradingBotTelegram:
     """
@@ -88,8 +126,32 @@ class TradingBotTelegram:
         # Initialize services and managers
         self.notification_manager = NotificationManager(self)
         
-        # Initialize the application
-        self.application = Application.builder().token(self.token).build()
+        # Initialize the application. Outbound calls share one pooled HTTP/2
+        # client so broadcast bursts multiplex over a single connection instead
+        # of queueing on PTB's small default pool; long polling gets its own
+        # client so it never holds a slot needed by sends. All outbound calls
+        # are shaped by the rate limiter so bursts queue rather than hit 429s.
+        self.application = (
+            Application.builder()
+            .token(self.token)
+            .request(HTTPXRequest(
+                connection_pool_size=BOT_CONNECTION_POOL_SIZE,
+                read_timeout=BOT_READ_TIMEOUT,
+                http_version="2"
+            ))
+            .get_updates_request(HTTPXRequest(
+                read_timeout=POLLING_TIMEOUT + BOT_READ_TIMEOUT,
+                http_version="2"
+            ))
+            .rate_limiter(AIORateLimiter(
+                overall_max_rate=BOT_OVERALL_MAX_RATE,
+                overall_time_period=BOT_OVERALL_TIME_PERIOD,
+                group_max_rate=BOT_GROUP_MAX_RATE,
+                group_time_period=BOT_GROUP_TIME_PERIOD,
+                max_retries=BOT_RATE_LIMIT_MAX_RETRIES
+            ))
+            .build()
+        )
         
         # Register command handlers
         self._register_handlers()
@@ -98,6 +160,9 @@ class TradingBotTelegram:
     
     def _register_handlers(self):
         """Register command and message handlers."""
+        # Authentication gate, runs before every other handler group
+        self.application.add_handler(TypeHandler(Update, auth_gate), group=-1)
+        
         # Basic commands
         self.application.add_handler(CommandHandler("start", start_command))
         self.application.add_handler(CommandHandler("help", help_command))
@@ -144,7 +209,7 @@ class TradingBotTelegram:
         # Start the bot
         await self.application.initialize()
         await self.application.start()
-        await self.application.updater.start_polling()
+        await self.application.updater.start_polling(timeout=POLLING_TIMEOUT)
         
         logger.info("Telegram bot started and polling for updates")
     
@@ -152,11 +217,19 @@ class TradingBotTelegram:
         """Stop the bot gracefully."""
         logger.info("Stopping Telegram bot...")
         
-        # Stop the bot
+        # Stop the bot; queued notifications and in-flight chart notifications
+        # are delivered (within a bounded wait) before the application stops
+        # and the chart browser closes
         await self.application.updater.stop()
+        await self.notification_manager.close()
         await self.application.stop()
         await self.application.shutdown()
         
+        # Close the shared chart browser if a chart was ever captured
+        chart_capture = sys.modules.get(f"{__package__}.chart_capture")
+        if chart_capture is not None:
+            await chart_capture.close_chart_browser()
+        
         logger.info("Telegram bot stopped")
     
     async def send_message(
@@ -195,10 +268,11 @@ class TradingBotTelegram:
     async def broadcast_message(
         self, 
         text: str, 
-        users: Optional[List[Union[str, int]]] = None,
+        users: Optional[Sequence[Union[str, int]]] = None,
         admin_only: bool = False,
-        parse_mode: Optional[str] = ParseMode.HTML
-    ) -> Dict[Union[str, int], bool]:
+        parse_mode: Optional[str] = ParseMode.HTML,
+        return_aggregate: bool = False
+    ) -> Union[Dict[Union[str, int], bool], Tuple[int, int]]:
         """
         Broadcast a message to multiple users.
         
@@ -207,9 +281,12 @@ class TradingBotTelegram:
             users: List of user chat_ids to send to (None for all users)
             admin_only: If True, send only to admin users
             parse_mode: The parse mode for the message
+            return_aggregate: If True, return only (success, fail) counts
+                instead of per-user results
             
         Returns:
-            Dictionary mapping chat_ids to success status
+            Dictionary mapping chat_ids to success status, or a
+            (success_count, fail_count) tuple when return_aggregate is set
         """
         results = {}
         
@@ -224,31 +301,35 @@ class TradingBotTelegram:
         
         if not users:
             logger.warning("No users to broadcast message to")
-            return results
+            return (0, 0) if return_aggregate else results
+        
+        # Send concurrently; the semaphore bounds in-flight requests and the
+        # application's rate limiter paces them against Telegram's caps
+        semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
         
-        # Send messages
-        for chat_id in users:
-            logger.debug(f"Attempting to send message to chat_id: {chat_id}")
-            success = await self.send_message(chat_id, text, parse_mode)
+        async def _send_one(chat_id: Union[str, int]) -> bool:
+            async with semaphore:
+                return await self.send_message(chat_id, text, parse_mode)
+        
+        sent = await asyncio.gather(*(_send_one(chat_id) for chat_id in users))
+        
+        if return_aggregate:
+            success_count = sum(sent)
+            logger.info(f"Broadcast sent to {success_count}/{len(users)} users")
+            return success_count, len(users) - success_count
+        
+        for chat_id, success in zip(users, sent):
             results[chat_id] = success
             logger.info(f"Message to {chat_id} {'sent successfully' if success else 'failed'}")
         
         return results
     
-    def get_user_manager(self):
+    def get_user_manager(self) -> "LegacyUserManager":
         """
         Legacy method to maintain compatibility.
         Returns an object that simulates the UserManager interface.
         """
-        # Create a minimal compatible interface
-        class LegacyUserManager:
-            def get_all_users(self):
-                return get_all_users()
-                
-            def get_admin_users(self):
-                return get_admin_users()
-        
-        return LegacyUserManager()
+        return _LEGACY_USER_MANAGER
     
     def get_notification_manager(self) -> NotificationManager:
         """Get the notification manager instance."""
@@ -278,9 +359,17 @@ async def main():
     try:
         await bot.start()
         
-        # Keep the bot running
-        while True:
-            await asyncio.sleep(1)
+        # Keep the bot running until a termination signal arrives
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                # Signal handlers are unavailable on Windows event loops;
+                # KeyboardInterrupt still ends the wait there
+                pass
+        await stop_event.wait()
             
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received, shutting down...")
@@ -2,28 +2,39 @@
 telegram_callbacks.py
 Callback query handlers for the Telegram bot.
 """
+import asyncio
 import logging
 import re
 from typing import Dict, List, Optional, Any, Callable, Awaitable, Tuple
 
 from telegram import Update
+from telegram.error import BadRequest, TelegramError
 from telegram.ext import ContextTypes, CallbackContext
 
+from ..core.config import DEFAULT_TP_PERCENTAGES_3, DEFAULT_TP_PERCENTAGES_4
 from .telegram_commands import (
     positions_command,
     position_command,
     profit_command,
     stats_command,
     help_command,
-    close_position_command
+    close_position_command,
+    close_all_command,
+    get_position_service
 )
-from .telegram_users import check_auth, admin_only
+from .telegram_markup import get_confirmation_markup, get_take_profit_markup
+from .telegram_users import admin_only
 
 
 logger = logging.getLogger(__name__)
 
+# Take profit callback data, as built by telegram_markup:
+#   execute_tp_{position_id}_{level}
+#   confirm_tp_{level}_{position_id} / cancel_tp_{level}_{position_id}
+_EXECUTE_TP_RE = re.compile(r"^execute_tp_(?P<pid>[A-Za-z0-9-]+)_(?P<lvl>\d+)$")
+_TP_DECISION_RE = re.compile(r"^(?P<kind>confirm_tp|cancel_tp)_(?P<lvl>\d+)_(?P<pid>[A-Za-z0-9-]+)$")
+
 
-@check_auth
 async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle callback queries from inline keyboard buttons.
@@ -72,7 +83,6 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             position_id = query.data.split("_", 1)[1]
             
             # Set up confirmation keyboard
-            from .telegram_markup import get_confirmation_markup
             markup = get_confirmation_markup(
                 action="close",
                 entity_id=position_id,
@@ -103,7 +113,6 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         
         elif query.data == "positions_close_all":
             # Set up confirmation keyboard for closing all positions
-            from .telegram_markup import get_confirmation_markup
             markup = get_confirmation_markup(
                 action="closeall",
                 entity_id="all",
@@ -118,7 +127,6 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         
         elif query.data == "confirm_closeall_all":
             # Close all positions
-            from .telegram_commands import close_all_command
             await close_all_command(update, context)
         
         elif query.data == "cancel_closeall_all":
@@ -136,7 +144,6 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             position_id = query.data.split("_", 1)[1]
             
             # Get position details
-            from ..main import get_position_service
             position_service = get_position_service()
             position = await position_service.repository.get_by_id(position_id)
             
@@ -158,7 +165,6 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
                 return
             
             # Create TP options keyboard
-            from .telegram_markup import get_take_profit_markup
             markup = get_take_profit_markup(position_id, available_tps)
             
             await query.edit_message_text(
@@ -168,12 +174,12 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         
         elif query.data.startswith("execute_tp_"):
             # Execute take profit
-            parts = query.data.split("_")
-            position_id = parts[2]
-            tp_level = int(parts[3])
+            match = _EXECUTE_TP_RE.match(query.data)
+            if not match:
+                raise ValueError(f"Malformed take profit callback: {query.data}")
+            position_id, tp_level = match["pid"], int(match["lvl"])
             
             # Set up confirmation keyboard
-            from .telegram_markup import get_confirmation_markup
             markup = get_confirmation_markup(
                 action=f"tp_{tp_level}",
                 entity_id=position_id,
@@ -188,30 +194,26 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         
         elif query.data.startswith("confirm_tp_"):
             # Confirm take profit execution
-            parts = query.data.split("_")
-            tp_level = int(parts[1])
-            position_id = parts[2]
-            
-            # Send wait message
-            await query.edit_message_text(
-                f"Executing TP {tp_level} for position {position_id}... Please wait."
-            )
+            match = _TP_DECISION_RE.match(query.data)
+            if not match:
+                raise ValueError(f"Malformed take profit callback: {query.data}")
+            position_id, tp_level = match["pid"], int(match["lvl"])
             
             # Get position and execute TP
-            from ..main import get_position_service
             position_service = get_position_service()
             
+            # Send wait message while the position is being looked up; it must
+            # land before any later edit of the same message
+            wait_task = asyncio.create_task(query.edit_message_text(
+                f"Executing TP {tp_level} for position {position_id}... Please wait."
+            ))
+            
             try:
-                # Get default TP percentages
-                from ..core.config import (
-                    DEFAULT_TP_PERCENTAGES_3,
-                    DEFAULT_TP_PERCENTAGES_4
-                )
-                
                 # Get position
                 position = await position_service.repository.get_by_id(position_id)
                 
                 if not position:
+                    await wait_task
                     await query.edit_message_text(
                         f"Position with ID {position_id} not found. It may have been closed."
                     )
@@ -242,19 +244,22 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
                         f"Remaining quantity: {updated_position.remaining_quantity}"
                     )
                 
+                await wait_task
                 await query.edit_message_text(message)
                 
             except Exception as e:
                 logger.error(f"Error executing TP: {str(e)}", exc_info=True)
+                await asyncio.gather(wait_task, return_exceptions=True)
                 await query.edit_message_text(
                     f"Error executing TP {tp_level} for position {position_id}: {str(e)}"
                 )
         
         elif query.data.startswith("cancel_tp_"):
             # Cancel take profit execution
-            parts = query.data.split("_")
-            position_id = parts[2]
-            context.args = [position_id]
+            match = _TP_DECISION_RE.match(query.data)
+            if not match:
+                raise ValueError(f"Malformed take profit callback: {query.data}")
+            context.args = [match["pid"]]
             await position_command(update, context)
         
         elif query.data.startswith("strategy_"):
@@ -271,11 +276,16 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             )
     
     except Exception as e:
+        # Re-editing after "message is not modified" would fail the same way
+        if isinstance(e, BadRequest) and "not modified" in str(e).lower():
+            logger.debug(f"Callback edit skipped, message unchanged: {query.data}")
+            return
+        
         logger.error(f"Error handling callback: {str(e)}", exc_info=True)
         try:
             await query.edit_message_text(
                 f"Error processing command: {str(e)}"
             )
-        except:
+        except TelegramError:
             # The message might have been deleted or otherwise unavailable
-            pass
\ No newline at end of file
+            logger.debug("Failed to edit callback message with error", exc_info=True)
\ No newline at end of file
@@ -3,15 +3,18 @@ telegram_commands.py
 Command handlers for the Telegram bot.
 """
 import re
+import hmac
+import time
 import logging
 import asyncio
-from decimal import Decimal
+from collections import Counter, defaultdict
+from decimal import Decimal, localcontext
 from functools import wraps
 from typing import Dict, List, Optional, Any, Callable, Awaitable, Union, Tuple
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto
 from telegram.constants import ParseMode
-from telegram.ext import ContextTypes
+from telegram.ext import ApplicationHandlerStop, ContextTypes
 
 import sys
 import os
@@ -19,20 +22,20 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from ..services.position_service import PositionService
+from ..core.asset import Asset
 from ..core.position import Position, PositionDirection
 from ..core.config import (
     ENABLE_CHART_SNAPSHOTS, 
-    MULTI_COIN_CHARTS_URL_TEMPLATE,
     ASSET_SHORTNAME_MAP,
+    TELEGRAM_SECRET,
 )
 # Import CHART_PRESETS from the new config module
 from ..core.config import CHART_PRESETS
-from .chart_capture import capture_chart_screenshot
-# Import the renamed image utility
-from .image_utils import prepare_chart_image
+# chart_capture (Playwright) is imported on first use in chart_command,
+# so deployments without charts never load it
 
 # Import authentication functions directly
-from .telegram_users import is_authorized, is_admin, CHAT_ID_TO_USE
+from .telegram_users import is_authorized, is_admin, CHAT_ID_TO_USE, AUTHORIZED_USERS, ADMIN_USERS
 
 # REMOVED: Import from main which creates circular dependency
 # Instead, we'll get these services via app state or global variables
@@ -75,33 +78,159 @@ def get_signal_processor_instance():
         raise RuntimeError("Signal processor not initialized")
     return _signal_processor
 
-# Authentication decorators
-def check_auth(func: Callable) -> Callable:
+# When this process loaded the command handlers, for /stats uptime
+_START_TIME = time.time()
+
+# Reverse of ASSET_SHORTNAME_MAP (full symbol -> short name) for chart captions;
+# built in reverse so the first short name wins, as with a forward scan
+ASSET_FULL_TO_SHORT = {fs: sn for sn, fs in reversed(ASSET_SHORTNAME_MAP.items())}
+
+# Row templates for /positions, selected by the sign of the unrealized P&L
+_POSITION_ROW_GAIN = (
+    "- <code>{symbol}</code> | <b>{direction}</b> | <code>{quantity:.6f}</code> | "
+    "🟢 +{pnl:.2f} ({pct:.2f}%) | ID: <code>{short_id}</code>\n"
+)
+_POSITION_ROW_LOSS = (
+    "- <code>{symbol}</code> | <b>{direction}</b> | <code>{quantity:.6f}</code> | "
+    "🔴 {pnl:.2f} ({pct:.2f}%) | ID: <code>{short_id}</code>\n"
+)
+
+# Quick-access keyboard shown by /start; constant, so built once at import
+_START_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("👀 Open Positions", callback_data="positions"),
+        InlineKeyboardButton("📊 Profit Stats", callback_data="profit")
+    ],
+    [
+        InlineKeyboardButton("❓ Help", callback_data="help")
+    ]
+])
+
+
+def _position_markup(position_id: str) -> InlineKeyboardMarkup:
+    """Build the Refresh/Close quick-action keyboard for a position."""
+    return InlineKeyboardMarkup((
+        (
+            InlineKeyboardButton("🔄 Refresh", callback_data=f"refresh_{position_id}"),
+            InlineKeyboardButton("❌ Close Position", callback_data=f"close_{position_id}")
+        ),
+    ))
+
+
+# Maximum number of positions /closeall closes at the same time
+CLOSE_ALL_CONCURRENCY = 5
+
+# Significant digits for /profit aggregation; ample for 6-decimal display
+# while keeping Decimal additions cheaper than the default 28-digit context
+PROFIT_DECIMAL_PRECISION = 16
+
+# Shared Decimal zero (immutable, so safe to reuse)
+_D0 = Decimal('0')
+
+# Maximum photos Telegram accepts in one sendMediaGroup album
+MEDIA_GROUP_LIMIT = 10
+
+# Short-lived price cache shared by the command handlers
+PRICE_CACHE_TTL = 3.0  # seconds
+_price_cache: Dict[str, Tuple[float, Decimal]] = {}
+_price_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+async def cached_price(asset: Asset) -> Decimal:
     """
-    Decorator to check if a user is authorized before executing a command.
+    Get the current price of an asset, reusing a recent quote if available.
+    
+    Quotes are kept for PRICE_CACHE_TTL seconds so that commands issued in
+    quick succession (e.g. /positions then /profit) don't refetch the same
+    symbol. Concurrent misses for a symbol wait on one exchange request.
     
     Args:
-        func: Command handler function
+        asset: Asset to price
         
     Returns:
-        Wrapped function that checks authentication
+        Current price of the asset
     """
-    @wraps(func)
-    async def wrapped(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-        if not update.effective_chat:
-            return
-            
-        # Check if user is authorized directly
-        chat_id = str(update.effective_chat.id)
-        if is_authorized(chat_id):
-            return await func(update, context, *args, **kwargs)
-        else:
-            await update.effective_message.reply_text(
-                "You are not authorized to use this command. Please use /auth [token] to authenticate."
-            )
+    symbol = asset.symbol
+    async with _price_locks[symbol]:
+        cached = _price_cache.get(symbol)
+        now = time.monotonic()
+        if cached and now - cached[0] < PRICE_CACHE_TTL:
+            return cached[1]
+        
+        price = await get_exchange_adapter().get_current_price(asset)
+        _price_cache[symbol] = (time.monotonic(), price)
+        return price
+
+
+async def _fetch_current_prices(positions: List[Position]) -> Dict[str, Decimal]:
+    """
+    Fetch current prices for the distinct assets of the given positions.
+    
+    All requests are issued concurrently, so a command covering many
+    positions waits for one round trip rather than one per position.
+    
+    Args:
+        positions: Positions whose assets need pricing
+        
+    Returns:
+        Dictionary mapping asset symbol to current price
+    """
+    assets = {position.asset.symbol: position.asset for position in positions}
+    prices = await asyncio.gather(*(cached_price(asset) for asset in assets.values()))
+    return dict(zip(assets, prices))
+
+
+# Zeroed per-strategy profit bucket for /profit; copied, never mutated
+_STRAT_ZERO: Dict[str, Any] = {
+    'unrealized': _D0,
+    'realized': _D0,
+    'total': _D0,
+    'count_open': 0,
+    'count_closed': 0
+}
+
+
+# Commands unauthenticated chats may still use (to learn about and join the bot)
+PUBLIC_COMMANDS = frozenset({"start", "help", "auth"})
+
+
+# Authentication gate and decorators
+async def auth_gate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Pre-handler that stops processing of updates from unauthorized chats.
+    
+    Registered once as a TypeHandler in a group that runs before all command
+    handlers, so individual handlers need no authentication wrapper.
+    
+    Args:
+        update: Incoming update
+        context: Handler context
+        
+    Raises:
+        ApplicationHandlerStop: If the update should not reach any handler
+    """
+    chat = update.effective_chat
+    if not chat:
+        raise ApplicationHandlerStop
+    
+    if str(chat.id) in AUTHORIZED_USERS:
+        return
+    
+    message = update.effective_message
+    text = message.text if message else None
+    if text and text.startswith("/"):
+        command = text.split(maxsplit=1)[0][1:].split("@", 1)[0].lower()
+        if command in PUBLIC_COMMANDS:
             return
+        logger.warning(f"Unauthorized command /{command} from chat ID: {chat.id}")
+        await message.reply_text(
+            "You are not authorized to use this command. Please use /auth [token] to authenticate."
+        )
+    elif update.callback_query:
+        logger.warning(f"Unauthorized callback query from chat ID: {chat.id}")
+        await update.callback_query.answer("You are not authorized to use this bot.")
     
-    return wrapped
+    raise ApplicationHandlerStop
 
 
 def admin_only(func: Callable) -> Callable:
@@ -115,23 +244,45 @@ def admin_only(func: Callable) -> Callable:
         Wrapped function that checks admin status
     """
     @wraps(func)
-    async def wrapped(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-        if not update.effective_chat:
-            return
-            
-        # Check if user is an admin directly
-        chat_id = str(update.effective_chat.id)
-        if is_admin(chat_id):
-            return await func(update, context, *args, **kwargs)
-        else:
-            await update.effective_message.reply_text(
-                "This command is only available to admin users."
-            )
-            return
+    async def wrapped(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        # auth_gate guarantees an effective chat by the time handlers run
+        if str(update.effective_chat.id) in ADMIN_USERS:
+            return await func(update, context)
+        await update.effective_message.reply_text(
+            "This command is only available to admin users."
+        )
     
     return wrapped
 
 
+def safe_command(label: str) -> Callable:
+    """
+    Decorator factory that reports unexpected errors from a command handler.
+    
+    Logs the exception and replies with "{label}: {error}", so handlers
+    don't each need their own catch-all try/except.
+    
+    Args:
+        label: Error message prefix, e.g. "Error fetching system statistics"
+        
+    Returns:
+        Decorator for command handler functions
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapped(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            try:
+                return await func(update, context)
+            except Exception as e:
+                logger.exception("%s: %s", label, e)
+                if update.effective_message:
+                    await update.effective_message.reply_text(f"{label}: {str(e)}")
+        
+        return wrapped
+    
+    return decorator
+
+
 # Command handlers
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -146,22 +297,10 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     
     # Check if user is already authorized
     if is_authorized(chat_id):
-        # Create keyboard markup for quick command access
-        keyboard = [
-            [
-                InlineKeyboardButton("👀 Open Positions", callback_data="positions"),
-                InlineKeyboardButton("📊 Profit Stats", callback_data="profit")
-            ],
-            [
-                InlineKeyboardButton("❓ Help", callback_data="help")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.effective_message.reply_text(
             f"Hello {update.effective_user.first_name}! Welcome to the Trading Bot. "
             f"You are already authenticated. Use /help to see available commands.",
-            reply_markup=reply_markup
+            reply_markup=_START_MARKUP
         )
     else:
         await update.effective_message.reply_text(
@@ -249,9 +388,8 @@ async def auth_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     # Extract token
     token = context.args[0]
     
-    # Simplified authentication - just check against TELEGRAM_SECRET
-    from ..core.config import TELEGRAM_SECRET
-    if token == TELEGRAM_SECRET:
+    # Simplified authentication - constant-time check against TELEGRAM_SECRET
+    if TELEGRAM_SECRET and hmac.compare_digest(token.encode(), TELEGRAM_SECRET.encode()):
         # In our simplified approach, we could just add the chat_id to AUTHORIZED_USERS
         # but since we're using direct chat ID, this would only be necessary 
         # if we support dynamic user addition
@@ -265,7 +403,6 @@ async def auth_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         )
 
 
-@check_auth
 async def positions_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /positions command.
@@ -280,8 +417,8 @@ async def positions_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         position_service = get_position_service()
         
         # Ensure the latest positions are loaded from the file
-        await position_service.repository.reload_positions()
-        logger.info("Reloaded positions from file for /positions command.")
+        if await position_service.repository.reload_if_stale():
+            logger.info("Reloaded positions from file for /positions command.")
 
         # Get filter arguments if any
         filters = {}
@@ -308,66 +445,64 @@ async def positions_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 return
             
             # Format positions
-            message = f"📊 <b>Open Positions ({len(open_positions)})</b>\n\n"
+            parts = [f"📊 <b>Open Positions ({len(open_positions)})</b>\n\n"]
+            
+            # Fetch all prices up front to calculate P&L
+            current_prices = await _fetch_current_prices(open_positions)
             
             # Group positions by strategy
-            strategies = {}
+            strategies = defaultdict(list)
             for position in open_positions:
-                if position.bot_strategy not in strategies:
-                    strategies[position.bot_strategy] = []
                 strategies[position.bot_strategy].append(position)
             
             # Format each strategy
             for strategy, positions in strategies.items():
-                message += f"<b>Strategy: {strategy}</b>\n"
+                parts.append(f"<b>Strategy: {strategy}</b>\n")
                 
                 for position in positions:
-                    # Get current price to calculate P&L
-                    current_price = await position_service.exchange.get_current_price(position.asset)
+                    current_price = current_prices[position.asset.symbol]
                     
                     # Calculate P&L
                     pnl = position.get_unrealized_pnl(current_price)
                     pnl_percentage = position.get_pnl_percentage(current_price)
                     
-                    # Format P&L with color and symbol
-                    if pnl >= 0:
-                        pnl_str = f"🟢 +{pnl:.2f} ({pnl_percentage:.2f}%)"
-                    else:
-                        pnl_str = f"🔴 {pnl:.2f} ({pnl_percentage:.2f}%)"
-                    
-                    # Format position
-                    message += (
-                        f"- <code>{position.asset.symbol}</code> | <b>{position.direction.value}</b> | "
-                        f"<code>{position.remaining_quantity:.6f}</code> | {pnl_str} | "
-                        f"ID: <code>{position.id[:8]}</code>\n"
-                    )
+                    # Format position, with P&L colored by sign
+                    row_template = _POSITION_ROW_GAIN if pnl >= 0 else _POSITION_ROW_LOSS
+                    parts.append(row_template.format_map({
+                        'symbol': position.asset.symbol,
+                        'direction': position.direction.value,
+                        'quantity': position.remaining_quantity,
+                        'pnl': pnl,
+                        'pct': pnl_percentage,
+                        'short_id': position.id[:8]
+                    }))
                 
-                message += "\n"
+                parts.append("\n")
             
             # Add command info
-            message += (
+            parts.append(
                 "<i>Use /position [id] to view details of a specific position</i>\n"
                 "<i>Use /close [id] to close a position</i>"
             )
             
+            message = "".join(parts)
             await update.effective_message.reply_text(
                 message, 
                 parse_mode=ParseMode.HTML
             )
             
         except Exception as e:
-            logger.error(f"Error fetching positions: {str(e)}", exc_info=True)
+            logger.exception("Error fetching positions: %s", e)
             await update.effective_message.reply_text(
                 f"Error fetching positions: {str(e)}"
             )
     except Exception as e:
-        logger.error(f"Error reloading positions: {str(e)}", exc_info=True)
+        logger.exception("Error reloading positions: %s", e)
         await update.effective_message.reply_text(
             f"Error reloading positions: {str(e)}"
         )
 
 
-@check_auth
 async def position_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /position command.
@@ -391,11 +526,8 @@ async def position_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         # Get the position service
         position_service = get_position_service()
         
-        # Get all positions and find the one that matches
-        all_positions = await position_service.repository.get_open_positions()
-        
-        # Find matching position
-        matching_positions = [p for p in all_positions if p.id.startswith(position_id_partial)]
+        # Find open positions matching the (partial) ID
+        matching_positions = await position_service.repository.find_open_by_id_prefix(position_id_partial)
         
         if not matching_positions:
             await update.effective_message.reply_text(
@@ -405,12 +537,13 @@ async def position_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         
         if len(matching_positions) > 1:
             # Multiple matches, show a list
-            message = f"Found {len(matching_positions)} positions matching ID '{position_id_partial}':\n\n"
+            parts = [f"Found {len(matching_positions)} positions matching ID '{position_id_partial}':\n\n"]
             for position in matching_positions:
-                message += f"- ID: <code>{position.id}</code> | {position.asset.symbol} | {position.direction.value}\n"
+                parts.append(f"- ID: <code>{position.id}</code> | {position.asset.symbol} | {position.direction.value}\n")
             
-            message += "\nPlease provide a more specific ID."
+            parts.append("\nPlease provide a more specific ID.")
             
+            message = "".join(parts)
             await update.effective_message.reply_text(
                 message,
                 parse_mode=ParseMode.HTML
@@ -421,7 +554,7 @@ async def position_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         position = matching_positions[0]
         
         # Get current price to calculate P&L
-        current_price = await position_service.exchange.get_current_price(position.asset)
+        current_price = await cached_price(position.asset)
         
         # Calculate P&L
         unrealized_pnl = position.get_unrealized_pnl(current_price)
@@ -436,53 +569,44 @@ async def position_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             pnl_str = f"🔴 {total_pnl:.6f} ({pnl_percentage:.2f}%)"
         
         # Format position details
-        message = f"📊 <b>Position Details</b>\n\n"
-        message += f"<b>ID:</b> <code>{position.id}</code>\n"
-        message += f"<b>Asset:</b> {position.asset.symbol}\n"
-        message += f"<b>Direction:</b> {position.direction.value}\n"
-        message += f"<b>Strategy:</b> {position.bot_strategy}_{position.bot_settings}\n"
-        message += f"<b>Timeframe:</b> {position.timeframe}\n"
-        message += f"<b>Initial Quantity:</b> {position.initial_quantity:.6f}\n"
-        message += f"<b>Remaining Quantity:</b> {position.remaining_quantity:.6f}\n"
-        message += f"<b>Entry Price:</b> {position.entry_price:.6f}\n"
-        message += f"<b>Current Price:</b> {current_price:.6f}\n"
-        message += f"<b>P&L:</b> {pnl_str}\n"
-        message += f"<b>Timestamp:</b> {position.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        parts = [f"📊 <b>Position Details</b>\n\n"]
+        parts.append(f"<b>ID:</b> <code>{position.id}</code>\n")
+        parts.append(f"<b>Asset:</b> {position.asset.symbol}\n")
+        parts.append(f"<b>Direction:</b> {position.direction.value}\n")
+        parts.append(f"<b>Strategy:</b> {position.bot_strategy}_{position.bot_settings}\n")
+        parts.append(f"<b>Timeframe:</b> {position.timeframe}\n")
+        parts.append(f"<b>Initial Quantity:</b> {position.initial_quantity:.6f}\n")
+        parts.append(f"<b>Remaining Quantity:</b> {position.remaining_quantity:.6f}\n")
+        parts.append(f"<b>Entry Price:</b> {position.entry_price:.6f}\n")
+        parts.append(f"<b>Current Price:</b> {current_price:.6f}\n")
+        parts.append(f"<b>P&L:</b> {pnl_str}\n")
+        parts.append(f"<b>Timestamp:</b> {position.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
         
         # Add take profit information
-        message += f"<b>Take Profits:</b>\n"
+        parts.append(f"<b>Take Profits:</b>\n")
         if position.take_profits:
             for tp in position.take_profits:
-                message += (
+                parts.append(
                     f"- TP{tp.level}: {tp.quantity:.6f} @ {tp.price:.6f} "
                     f"({tp.timestamp.strftime('%Y-%m-%d %H:%M:%S')})\n"
                 )
         else:
-            message += "- No take profits executed yet\n"
-        
-        # Create inline keyboard for quick actions
-        keyboard = [
-            [
-                InlineKeyboardButton("🔄 Refresh", callback_data=f"refresh_{position.id}"),
-                InlineKeyboardButton("❌ Close Position", callback_data=f"close_{position.id}")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            parts.append("- No take profits executed yet\n")
         
+        message = "".join(parts)
         await update.effective_message.reply_text(
             message,
             parse_mode=ParseMode.HTML,
-            reply_markup=reply_markup
+            reply_markup=_position_markup(position.id)
         )
         
     except Exception as e:
-        logger.error(f"Error fetching position details: {str(e)}", exc_info=True)
+        logger.exception("Error fetching position details: %s", e)
         await update.effective_message.reply_text(
             f"Error fetching position details: {str(e)}"
         )
 
 
-@check_auth
 async def profit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /profit command.
@@ -499,29 +623,52 @@ async def profit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         # Get open positions
         open_positions = await position_service.repository.get_open_positions()
         
-        # Get closed positions (limit to recent ones)
-        closed_positions = await position_service.repository.get_closed_positions()
+        # Realized totals of closed positions, aggregated by the repository
+        realized_totals = await position_service.repository.get_realized_pnl_totals()
         
         # Calculate total profit
-        total_profit = Decimal('0')
-        unrealized_profit = Decimal('0')
-        realized_profit = Decimal('0')
+        total_profit = _D0
+        unrealized_profit = _D0
+        realized_profit = _D0
         
-        # Calculate unrealized profit from open positions
-        for position in open_positions:
-            current_price = await position_service.exchange.get_current_price(position.asset)
-            unrealized_profit += position.get_unrealized_pnl(current_price)
-            realized_profit += position.get_realized_pnl()
+        # Profit breakdown by strategy
+        strategies = defaultdict(_STRAT_ZERO.copy)
         
-        # Calculate realized profit from closed positions
-        for position in closed_positions:
-            realized_profit += position.get_realized_pnl()
+        # Fetch all prices up front to calculate unrealized profit
+        current_prices = await _fetch_current_prices(open_positions)
         
-        # Calculate total profit
-        total_profit = unrealized_profit + realized_profit
+        with localcontext() as ctx:
+            ctx.prec = PROFIT_DECIMAL_PRECISION
+            
+            # Calculate profit from open positions in a single pass
+            for position in open_positions:
+                upnl = position.get_unrealized_pnl(current_prices[position.asset.symbol])
+                rpnl = position.get_realized_pnl()
+                unrealized_profit += upnl
+                realized_profit += rpnl
+                
+                stats = strategies[position.bot_strategy]
+                stats['unrealized'] += upnl
+                stats['realized'] += rpnl
+                stats['total'] += upnl + rpnl
+                stats['count_open'] += 1
+            
+            # Add realized profit from closed positions
+            closed_count = 0
+            for strategy, (rpnl, count) in realized_totals.items():
+                realized_profit += rpnl
+                closed_count += count
+                
+                stats = strategies[strategy]
+                stats['realized'] += rpnl
+                stats['total'] += rpnl
+                stats['count_closed'] += count
+            
+            # Calculate total profit
+            total_profit = unrealized_profit + realized_profit
         
         # Format the profit message
-        message = f"📊 <b>Profit Statistics</b>\n\n"
+        parts = [f"📊 <b>Profit Statistics</b>\n\n"]
         
         # Format profit values with color and symbol
         if unrealized_profit >= 0:
@@ -539,79 +686,39 @@ async def profit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         else:
             total_str = f"🔴 {total_profit:.6f}"
         
-        message += f"<b>Unrealized Profit:</b> {unrealized_str}\n"
-        message += f"<b>Realized Profit:</b> {realized_str}\n"
-        message += f"<b>Total Profit:</b> {total_str}\n\n"
+        parts.append(f"<b>Unrealized Profit:</b> {unrealized_str}\n")
+        parts.append(f"<b>Realized Profit:</b> {realized_str}\n")
+        parts.append(f"<b>Total Profit:</b> {total_str}\n\n")
         
         # Add position counts
-        message += f"<b>Open Positions:</b> {len(open_positions)}\n"
-        message += f"<b>Closed Positions:</b> {len(closed_positions)}\n\n"
-        
-        # Profit breakdown by strategy
-        strategies = {}
-        
-        # Add open positions to strategies
-        for position in open_positions:
-            strategy = position.bot_strategy
-            if strategy not in strategies:
-                strategies[strategy] = {
-                    'unrealized': Decimal('0'),
-                    'realized': Decimal('0'),
-                    'total': Decimal('0'),
-                    'count_open': 0,
-                    'count_closed': 0
-                }
-            
-            current_price = await position_service.exchange.get_current_price(position.asset)
-            strategies[strategy]['unrealized'] += position.get_unrealized_pnl(current_price)
-            strategies[strategy]['realized'] += position.get_realized_pnl()
-            strategies[strategy]['total'] += position.get_unrealized_pnl(current_price) + position.get_realized_pnl()
-            strategies[strategy]['count_open'] += 1
-        
-        # Add closed positions to strategies
-        for position in closed_positions:
-            strategy = position.bot_strategy
-            if strategy not in strategies:
-                strategies[strategy] = {
-                    'unrealized': Decimal('0'),
-                    'realized': Decimal('0'),
-                    'total': Decimal('0'),
-                    'count_open': 0,
-                    'count_closed': 0
-                }
-            
-            strategies[strategy]['realized'] += position.get_realized_pnl()
-            strategies[strategy]['total'] += position.get_realized_pnl()
-            strategies[strategy]['count_closed'] += 1
+        parts.append(f"<b>Open Positions:</b> {len(open_positions)}\n")
+        parts.append(f"<b>Closed Positions:</b> {closed_count}\n\n")
         
         # Add strategy breakdown
         if strategies:
-            message += "<b>Profit by Strategy:</b>\n"
+            parts.append("<b>Profit by Strategy:</b>\n")
             
             for strategy, stats in strategies.items():
-                if stats['total'] >= 0:
-                    total_str = f"🟢 +{stats['total']:.6f}"
-                else:
-                    total_str = f"🔴 {stats['total']:.6f}"
-                
-                message += (
-                    f"- <b>{strategy}:</b> {total_str} | "
+                total = stats['total']
+                sign = "🟢 +" if total >= 0 else "🔴 "
+                parts.append(
+                    f"- <b>{strategy}:</b> {sign}{total:.6f} | "
                     f"Open: {stats['count_open']} | Closed: {stats['count_closed']}\n"
                 )
         
+        message = "".join(parts)
         await update.effective_message.reply_text(
             message,
             parse_mode=ParseMode.HTML
         )
         
     except Exception as e:
-        logger.error(f"Error calculating profit statistics: {str(e)}", exc_info=True)
+        logger.exception("Error calculating profit statistics: %s", e)
         await update.effective_message.reply_text(
             f"Error calculating profit statistics: {str(e)}"
         )
 
 
-@check_auth
 async def close_position_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /close command.
@@ -635,11 +742,8 @@ async def close_position_command(update: Update, context: ContextTypes.DEFAULT_T
         # Get the position service
         position_service = get_position_service()
         
-        # Get all open positions and find the one that matches
-        open_positions = await position_service.repository.get_open_positions()
-        
-        # Find matching position
-        matching_positions = [p for p in open_positions if p.id.startswith(position_id_partial)]
+        # Find open positions matching the (partial) ID
+        matching_positions = await position_service.repository.find_open_by_id_prefix(position_id_partial)
         
         if not matching_positions:
             await update.effective_message.reply_text(
@@ -649,12 +753,13 @@ async def close_position_command(update: Update, context: ContextTypes.DEFAULT_T
         
         if len(matching_positions) > 1:
             # Multiple matches, show a list
-            message = f"Found {len(matching_positions)} positions matching ID '{position_id_partial}':\n\n"
+            parts = [f"Found {len(matching_positions)} positions matching ID '{position_id_partial}':\n\n"]
             for position in matching_positions:
-                message += f"- ID: <code>{position.id}</code> | {position.asset.symbol} | {position.direction.value}\n"
+                parts.append(f"- ID: <code>{position.id}</code> | {position.asset.symbol} | {position.direction.value}\n")
             
-            message += "\nPlease provide a more specific ID."
+            parts.append("\nPlease provide a more specific ID.")
             
+            message = "".join(parts)
             await update.effective_message.reply_text(
                 message,
                 parse_mode=ParseMode.HTML
@@ -665,7 +770,7 @@ async def close_position_command(update: Update, context: ContextTypes.DEFAULT_T
         position = matching_positions[0]
         
         # Send confirmation message
-        await update.effective_message.reply_text(
+        status_message = await update.effective_message.reply_text(
             f"Closing position {position.asset.symbol} {position.direction.value}...\n"
             f"This may take a moment."
         )
@@ -676,8 +781,8 @@ async def close_position_command(update: Update, context: ContextTypes.DEFAULT_T
             f"Closed via Telegram by user {update.effective_user.id}"
         )
         
-        # Notify about success
-        await update.effective_message.reply_text(
+        # Replace the progress message with the result
+        await status_message.edit_text(
             f"✅ Position closed successfully!\n\n"
             f"<b>Asset:</b> {closed_position.asset.symbol}\n"
             f"<b>Direction:</b> {closed_position.direction.value}\n"
@@ -687,13 +792,12 @@ async def close_position_command(update: Update, context: ContextTypes.DEFAULT_T
         )
         
     except Exception as e:
-        logger.error(f"Error closing position: {str(e)}", exc_info=True)
+        logger.exception("Error closing position: %s", e)
         await update.effective_message.reply_text(
             f"Error closing position: {str(e)}"
         )
 
 
-@check_auth
 async def close_all_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /closeall command.
@@ -726,69 +830,84 @@ async def close_all_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             )
             return
         
-        # Send confirmation message
-        await update.effective_message.reply_text(
+        # Send progress message, later replaced by the summary
+        status_message = await update.effective_message.reply_text(
             f"Closing {len(open_positions)} positions..." +
             (f" for strategy '{strategy_filter}'" if strategy_filter else "") +
             "\nThis may take a moment."
         )
         
-        # Close all positions
-        results = []
-        for position in open_positions:
-            try:
-                closed_position, order = await position_service.close_position(
-                    position.id, 
-                    f"Closed via Telegram by user {update.effective_user.id}"
-                )
-                results.append({
-                    'asset': closed_position.asset.symbol,
-                    'direction': closed_position.direction.value,
-                    'success': True,
-                    'pnl': closed_position.get_realized_pnl()
-                })
-            except Exception as e:
-                logger.error(f"Error closing position {position.id}: {str(e)}")
-                results.append({
-                    'asset': position.asset.symbol,
-                    'direction': position.direction.value,
-                    'success': False,
-                    'error': str(e)
-                })
+        # Close all positions, a few at a time to stay under exchange order limits
+        close_reason = f"Closed via Telegram by user {update.effective_user.id}"
+        semaphore = asyncio.Semaphore(CLOSE_ALL_CONCURRENCY)
+        
+        async def _close(position: Position) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    closed_position, order = await position_service.close_position(
+                        position.id, 
+                        close_reason
+                    )
+                    return {
+                        'asset': closed_position.asset.symbol,
+                        'direction': closed_position.direction.value,
+                        'success': True,
+                        'pnl': closed_position.get_realized_pnl()
+                    }
+                except Exception as e:
+                    logger.error(f"Error closing position {position.id}: {str(e)}")
+                    return {
+                        'asset': position.asset.symbol,
+                        'direction': position.direction.value,
+                        'success': False,
+                        'error': str(e)
+                    }
+        
+        results = await asyncio.gather(*(_close(position) for position in open_positions))
+        
+        # Tally results in a single pass
+        succeeded = 0
+        total_pnl = _D0
+        failed = []
+        for result in results:
+            if result['success']:
+                succeeded += 1
+                total_pnl += result['pnl']
+            else:
+                failed.append(result)
         
-        # Format results
-        message = f"📊 <b>Close All Results</b>\n\n"
-        message += f"<b>Total Positions:</b> {len(open_positions)}\n"
-        message += f"<b>Successfully Closed:</b> {sum(1 for r in results if r['success'])}\n"
-        message += f"<b>Failed:</b> {sum(1 for r in results if not r['success'])}\n\n"
+        # Format results as one summary message
+        parts = [f"📊 <b>Close All Results</b>\n\n"]
+        parts.append(f"<b>Total Positions:</b> {len(open_positions)}\n")
+        parts.append(f"<b>Successfully Closed:</b> {succeeded}\n")
+        parts.append(f"<b>Failed:</b> {len(failed)}\n\n")
         
-        total_pnl = sum(r['pnl'] for r in results if r['success'])
         if total_pnl >= 0:
             pnl_str = f"🟢 +{total_pnl:.6f}"
         else:
             pnl_str = f"🔴 {total_pnl:.6f}"
         
-        message += f"<b>Total Realized PnL:</b> {pnl_str}\n\n"
+        parts.append(f"<b>Total Realized PnL:</b> {pnl_str}\n\n")
         
-        if sum(1 for r in results if not r['success']) > 0:
-            message += "<b>Failed Positions:</b>\n"
-            for result in results:
-                if not result['success']:
-                    message += f"- {result['asset']} {result['direction']}: {result['error']}\n"
+        if failed:
+            parts.append("<b>Failed Positions:</b>\n")
+            for result in failed:
+                parts.append(f"- {result['asset']} {result['direction']}: {result['error']}\n")
         
-        await update.effective_message.reply_text(
+        message = "".join(parts)
+        await status_message.edit_text(
             message,
             parse_mode=ParseMode.HTML
         )
         
     except Exception as e:
-        logger.error(f"Error closing all positions: {str(e)}", exc_info=True)
+        logger.exception("Error closing all positions: %s", e)
         await update.effective_message.reply_text(
             f"Error closing all positions: {str(e)}"
         )
 
 
-@check_auth
+@safe_command("Error fetching system statistics")
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /stats command.
@@ -798,77 +917,48 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     if not update.effective_chat:
         return
     
-    try:
-        # Get the position service and exchange adapter
-        position_service = get_position_service()
-        exchange_adapter = get_exchange_adapter()
-        
-        # Get open positions
-        open_positions = await position_service.repository.get_open_positions()
-        
-        # Get exchange rate limits
-        # This would need to be implemented in the exchange adapter
-        rate_limits = "Rate limits not available"  # Placeholder
-        
-        # Get bot uptime
-        import time
-        from ..main import get_start_time
-        
-        current_time = time.time()
-        start_time = get_start_time()
-        uptime_seconds = current_time - start_time
-        
-        # Format uptime
-        days, remainder = divmod(uptime_seconds, 86400)
-        hours, remainder = divmod(remainder, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        
-        uptime_str = f"{int(days)}d {int(hours)}h {int(minutes)}m {int(seconds)}s"
-        
-        # Format message
-        message = f"📊 <b>System Statistics</b>\n\n"
-        message += f"<b>Uptime:</b> {uptime_str}\n"
-        message += f"<b>Open Positions:</b> {len(open_positions)}\n"
-        
-        # Add asset distribution
-        asset_counts = {}
-        for position in open_positions:
-            asset = position.asset.symbol
-            if asset not in asset_counts:
-                asset_counts[asset] = 0
-            asset_counts[asset] += 1
-        
-        if asset_counts:
-            message += "\n<b>Assets Distribution:</b>\n"
-            for asset, count in asset_counts.items():
-                message += f"- {asset}: {count} positions\n"
-        
-        # Add strategy distribution
-        strategy_counts = {}
-        for position in open_positions:
-            strategy = position.bot_strategy
-            if strategy not in strategy_counts:
-                strategy_counts[strategy] = 0
-            strategy_counts[strategy] += 1
-        
-        if strategy_counts:
-            message += "\n<b>Strategy Distribution:</b>\n"
-            for strategy, count in strategy_counts.items():
-                message += f"- {strategy}: {count} positions\n"
-        
-        # Add API rate limit info
-        message += f"\n<b>Exchange API:</b>\n{rate_limits}\n"
-        
-        await update.effective_message.reply_text(
-            message,
-            parse_mode=ParseMode.HTML
-        )
-        
-    except Exception as e:
-        logger.error(f"Error fetching system statistics: {str(e)}", exc_info=True)
-        await update.effective_message.reply_text(
-            f"Error fetching system statistics: {str(e)}"
-        )
+    # Get the position service
+    position_service = get_position_service()
+    
+    # Get open positions
+    open_positions = await position_service.repository.get_open_positions()
+    
+    # Get bot uptime
+    uptime_seconds = time.time() - _START_TIME
+    
+    # Format uptime
+    days, remainder = divmod(uptime_seconds, 86400)
+    hours, remainder = divmod(remainder, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    
+    uptime_str = f"{int(days)}d {int(hours)}h {int(minutes)}m {int(seconds)}s"
+    
+    # Format message
+    parts = [f"📊 <b>System Statistics</b>\n\n"]
+    parts.append(f"<b>Uptime:</b> {uptime_str}\n")
+    parts.append(f"<b>Open Positions:</b> {len(open_positions)}\n")
+    
+    # Add asset distribution
+    asset_counts = Counter(position.asset.symbol for position in open_positions)
+    
+    if asset_counts:
+        parts.append("\n<b>Assets Distribution:</b>\n")
+        for asset, count in asset_counts.items():
+            parts.append(f"- {asset}: {count} positions\n")
+    
+    # Add strategy distribution
+    strategy_counts = Counter(position.bot_strategy for position in open_positions)
+    
+    if strategy_counts:
+        parts.append("\n<b>Strategy Distribution:</b>\n")
+        for strategy, count in strategy_counts.items():
+            parts.append(f"- {strategy}: {count} positions\n")
+    
+    message = "".join(parts)
+    await update.effective_message.reply_text(
+        message,
+        parse_mode=ParseMode.HTML
+    )
 
 
 @admin_only
@@ -952,118 +1042,67 @@ async def list_users_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     admin_users = get_admin_users()
     
     # Format the user list
-    message = "Authorized users:\n\n"
+    parts = ["Authorized users:\n\n"]
     
     if not all_users:
-        message += "No users found."
+        parts.append("No users found.")
     else:
         for user_id in all_users:
             user_type = "Admin" if user_id in admin_users else "User"
-            message += f"- {user_id} ({user_type})\n"
+            parts.append(f"- {user_id} ({user_type})\n")
     
-    await update.effective_message.reply_text(message)
+    await update.effective_message.reply_text("".join(parts))
 
 
-async def _process_single_chart(full_symbol: str, url_template: str, update: Update):
+async def _capture_single_chart(full_symbol: str, update: Update) -> Optional[Tuple[bytes, str]]:
     """
-    Helper function to process chart generation for a single asset.
+    Helper function to capture and prepare the chart for a single asset.
+    
+    The chart is returned rather than sent so the caller can batch photos
+    into media groups. Capture concurrency, retries and caching are handled
+    by chart_capture.get_chart_image.
     
     Args:
         full_symbol: The asset symbol, potentially prefixed (e.g., BINANCE:BTCUSDT).
-        url_template: The MultiCoinCharts URL template.
         update: The Telegram Update object.
+        
+    Returns:
+        Tuple of (image bytes, caption), or None if the chart could not be produced
     """
     try:
-        # Generate the asset string for the URL by repeating the single asset
-        asset_param = full_symbol # Assumes prefix is already included if provided by caller
-        assets_string = ",".join([asset_param] * 4) # Repeat single asset
-        target_url = url_template.format(ASSETS=assets_string)
-
+        from .chart_capture import get_chart_image, CHART_CAPTURE_ATTEMPTS
+        
         # Try to find short name for display, fallback to symbol without prefix
         symbol_only = full_symbol.split(':')[-1] if ':' in full_symbol else full_symbol
-        display_name = next((sn for sn, fs in ASSET_SHORTNAME_MAP.items() if fs == symbol_only), symbol_only)
+        display_name = ASSET_FULL_TO_SHORT.get(symbol_only, symbol_only)
+        caption = f"MultiCoinCharts: {display_name}" # Simplified caption
         
-        # Let user know we're trying to capture the screenshot
-        await update.effective_message.reply_text(
-            f"Capturing chart for {display_name}... (This may take up to 30 seconds)"
-        )
-        
-        # Use a more generous timeout for the screenshot capture
-        capture_attempt = 0
-        max_attempts = 2
-        screenshot_path = None
-        
-        while capture_attempt < max_attempts and not screenshot_path:
-            capture_attempt += 1
-            try:
-                screenshot_path = await capture_chart_screenshot(target_url=target_url)
-                if not screenshot_path and capture_attempt < max_attempts:
-                    logger.warning(f"Screenshot capture failed for {display_name}, attempt {capture_attempt}. Retrying...")
-                    await asyncio.sleep(2)  # Short delay before retry
-            except Exception as capture_err:
-                logger.error(f"Error during screenshot capture for {display_name}: {capture_err}", exc_info=True)
-                if capture_attempt < max_attempts:
-                    logger.info(f"Retrying screenshot capture for {display_name}...")
-                    await asyncio.sleep(2)  # Short delay before retry
-        
-        if screenshot_path:
-            # --- Prepare the image --- 
-            logger.info(f"Preparing screenshot for {display_name}: {screenshot_path}")
-            prepared_path = prepare_chart_image(
-                image_path=screenshot_path, 
-                top_percent=15.0, 
-                bottom_percent=30.0,
-                border_size=2,
-                border_color="black"
-            )
-            
-            path_to_send = prepared_path if prepared_path else screenshot_path
-            if not prepared_path:
-                 logger.warning(f"Image preparation failed for {screenshot_path}, sending original.")
-            # ------------------------- 
-
-            try:
-                logger.info(f"Sending chart photo for {display_name}...")
-                await update.effective_message.reply_photo(
-                    photo=open(path_to_send, 'rb'), # Use path_to_send
-                    caption=f"MultiCoinCharts: {display_name}", # Simplified caption
-                )
-                return True # Indicate success
-            finally:
-                # Clean up temporary files (handles original if prep failed)
-                cleanup_paths = [screenshot_path]
-                if prepared_path and prepared_path != screenshot_path:
-                    cleanup_paths.append(prepared_path)
-                for p in cleanup_paths:
-                    if os.path.exists(p):
-                        try:
-                            os.remove(p)
-                            temp_dir = os.path.dirname(p)
-                            if os.path.exists(temp_dir) and not os.listdir(temp_dir):
-                                try: os.rmdir(temp_dir)
-                                except OSError: pass 
-                        except OSError as e:
-                            logger.warning(f"Error removing temp file/dir {p}: {e}")
+        # Prefix is assumed to be included already if provided by caller
+        photo_bytes = await get_chart_image(full_symbol, display_name)
+    
+        if photo_bytes:
+            return photo_bytes, caption
         else:
             await update.effective_message.reply_text(
-                f"Failed to capture chart for {display_name} after {max_attempts} attempts. The site may be temporarily unavailable."
+                f"Failed to capture chart for {display_name} after {CHART_CAPTURE_ATTEMPTS} attempts. The site may be temporarily unavailable."
             )
-            return False # Indicate capture failure
-            
+            return None # Indicate capture failure
+        
     except Exception as e:
         # Determine display name for error message even if processing failed early
         symbol_only_err = full_symbol.split(':')[-1] if ':' in full_symbol else full_symbol
-        display_name_err = next((sn for sn, fs in ASSET_SHORTNAME_MAP.items() if fs == symbol_only_err), symbol_only_err)
-        logger.error(f"Error processing chart for {display_name_err} in _process_single_chart: {str(e)}", exc_info=True)
+        display_name_err = ASSET_FULL_TO_SHORT.get(symbol_only_err, symbol_only_err)
+        logger.error(f"Error processing chart for {display_name_err} in _capture_single_chart: {str(e)}", exc_info=True)
         try:
              await update.effective_message.reply_text(
                  f"Error generating chart for {display_name_err}: {str(e)}"
              )
         except Exception as send_err:
              logger.error(f"Failed to send error message to user for {display_name_err}: {send_err}")
-        return False # Indicate processing failure
+        return None # Indicate processing failure
+
 
-@check_auth
+@safe_command("Error generating charts")
 async def chart_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handle the /chart command.
@@ -1083,8 +1122,9 @@ async def chart_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         )
         return
 
-    url_template = MULTI_COIN_CHARTS_URL_TEMPLATE
-    if not url_template or '{ASSETS}' not in url_template:
+    from .chart_capture import CHART_URL_TEMPLATE_VALID
+    
+    if not CHART_URL_TEMPLATE_VALID:
         await update.effective_message.reply_text(
             "MultiCoinCharts URL template is missing or invalid."
         )
@@ -1099,16 +1139,17 @@ async def chart_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         try:
             position_service = get_position_service()
             
-            # Reload positions to ensure we have the latest data
-            logger.info("Reloading positions from file for /chart command.")
-            await position_service.repository.reload_positions()
+            # Reload positions only if the file changed since the last load
+            if await position_service.repository.reload_if_stale():
+                logger.info("Reloaded positions from file for /chart command.")
             
             open_positions = await position_service.repository.get_open_positions()
             if not open_positions:
                 await update.effective_message.reply_text("No open positions found.")
                 return
             # Use BINANCE prefix for open positions (adjust if needed)
-            unique_symbols = sorted(list(set(f"BINANCE:{pos.asset.symbol}" for pos in open_positions)))
+            # Deduplicate preserving position order; charts are sent as they complete anyway
+            unique_symbols = list(dict.fromkeys(f"BINANCE:{pos.asset.symbol}" for pos in open_positions))
             symbols_to_process = unique_symbols
             request_description = "open positions"
             if not symbols_to_process:
@@ -1157,19 +1198,50 @@ async def chart_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         # Previous messages should have informed the user
         return
         
-    await update.effective_message.reply_text(
-        f"Generating {len(symbols_to_process)} chart(s) for {request_description}..."
+    # One status message for the whole request, edited as charts complete
+    total = len(symbols_to_process)
+    status_message = await update.effective_message.reply_text(
+        f"Capturing 0/{total} chart(s) for {request_description}... (This may take up to 30 seconds each)"
     )
-        
-    tasks = []
-    for symbol in symbols_to_process:
-        tasks.append(asyncio.create_task(_process_single_chart(symbol, url_template, update)))
     
-    # Wait for all tasks to complete
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Stream results as charts finish; get_chart_image bounds how many capture
+    # at once and time-limits each attempt, so a hung capture can't stall the rest
+    results = []
+    for next_result in asyncio.as_completed(
+        [_capture_single_chart(symbol, update) for symbol in symbols_to_process]
+    ):
+        try:
+            results.append(await next_result)
+        except Exception as e:
+            logger.error(f"Unexpected error in chart task for {request_description}: {str(e)}", exc_info=True)
+            results.append(e)
+        try:
+            await status_message.edit_text(
+                f"Captured {len(results)}/{total} chart(s) for {request_description}..."
+            )
+        except Exception as e:
+            logger.debug(f"Could not update /chart status message: {str(e)}")
+    
+    charts = [r for r in results if isinstance(r, tuple)]
+    
+    # Send charts as albums to cut API calls; a lone chart goes as a plain photo
+    success_count = 0
+    for i in range(0, len(charts), MEDIA_GROUP_LIMIT):
+        chunk = charts[i:i + MEDIA_GROUP_LIMIT]
+        try:
+            logger.info(f"Sending {len(chunk)} chart photo(s) for {request_description}...")
+            if len(chunk) == 1:
+                photo, caption = chunk[0]
+                await update.effective_message.reply_photo(photo=photo, caption=caption)
+            else:
+                await update.effective_message.reply_media_group(
+                    media=[InputMediaPhoto(media=photo, caption=caption) for photo, caption in chunk]
+                )
+            success_count += len(chunk)
+        except Exception as e:
+            logger.error(f"Error sending chart photos for {request_description}: {str(e)}", exc_info=True)
     
     # Log summary of results
-    success_count = sum(1 for r in results if isinstance(r, bool) and r)
     error_count = len(results) - success_count
     logger.info(f"Finished processing chart command for {request_description}. Success: {success_count}, Failed: {error_count}")
-    await update.effective_message.reply_text(f"Finished generating {success_count}/{len(results)} chart(s) for {request_description}.")
\ No newline at end of file
+    await status_message.edit_text(f"Finished generating {success_count}/{len(results)} chart(s) for {request_description}.")
\ No newline at end of file
@@ -2,6 +2,9 @@
 telegram_markup.py
 Markup generators for Telegram bot UI elements.
 """
+import functools
+from itertools import groupby
+from operator import attrgetter
 from typing import List, Optional, Dict, Any, Union
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
@@ -10,6 +13,19 @@ from ..core.position import Position
 from ..core.config import TELEGRAM_INLINE_BUTTONS
 
 
+# Markups are immutable, so the constant main menu is built once and shared
+_MAIN_MENU_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("👀 Open Positions", callback_data="positions"),
+        InlineKeyboardButton("📊 Profit Stats", callback_data="profit")
+    ],
+    [
+        InlineKeyboardButton("📈 System Stats", callback_data="stats"),
+        InlineKeyboardButton("❓ Help", callback_data="help")
+    ]
+]) if TELEGRAM_INLINE_BUTTONS else None
+
+
 def get_main_menu_markup() -> InlineKeyboardMarkup:
     """
     Get the main menu markup with quick commands.
@@ -17,23 +33,10 @@ def get_main_menu_markup() -> InlineKeyboardMarkup:
     Returns:
         InlineKeyboardMarkup with main menu options
     """
-    if not TELEGRAM_INLINE_BUTTONS:
-        return None
-        
-    keyboard = [
-        [
-            InlineKeyboardButton("👀 Open Positions", callback_data="positions"),
-            InlineKeyboardButton("📊 Profit Stats", callback_data="profit")
-        ],
-        [
-            InlineKeyboardButton("📈 System Stats", callback_data="stats"),
-            InlineKeyboardButton("❓ Help", callback_data="help")
-        ]
-    ]
-    
-    return InlineKeyboardMarkup(keyboard)
+    return _MAIN_MENU_MARKUP
 
 
+@functools.lru_cache(maxsize=512)
 def get_position_actions_markup(position_id: str) -> InlineKeyboardMarkup:
     """
     Get position actions markup for a specific position.
@@ -74,19 +77,18 @@ def get_positions_list_markup(positions: List[Position]) -> Optional[InlineKeybo
     if not positions or not TELEGRAM_INLINE_BUTTONS:
         return None
     
-    # Group positions by strategy
-    strategies = {}
-    for position in positions:
-        if position.bot_strategy not in strategies:
-            strategies[position.bot_strategy] = []
-        strategies[position.bot_strategy].append(position)
+    # Sort once by strategy (stable, so positions keep their order within a
+    # strategy); after sorting, multiple strategies means first != last
+    by_strategy = attrgetter('bot_strategy')
+    positions_sorted = sorted(positions, key=by_strategy)
+    multiple_strategies = positions_sorted[0].bot_strategy != positions_sorted[-1].bot_strategy
     
     keyboard = []
     
-    # Create buttons for each position, grouped by strategy
-    for strategy, strat_positions in strategies.items():
+    # Create buttons for each position in a single pass, grouped by strategy
+    for strategy, strat_positions in groupby(positions_sorted, key=by_strategy):
         # Add strategy header if we have multiple strategies
-        if len(strategies) > 1:
+        if multiple_strategies:
             keyboard.append([
                 InlineKeyboardButton(f"📊 {strategy}", callback_data=f"strategy_{strategy}")
             ])
@@ -100,11 +102,13 @@ def get_positions_list_markup(positions: List[Position]) -> Optional[InlineKeybo
             else:
                 row = keyboard[-1]
             
-            # Create button for position
-            button_text = f"{position.asset.symbol} {position.direction.value}"
+            # Create button for position, reading each attribute chain once
+            pid = position.id
+            sym = position.asset.symbol
+            dirv = position.direction.value
             row.append(InlineKeyboardButton(
-                button_text, 
-                callback_data=f"position_{position.id}"
+                f"{sym} {dirv}", 
+                callback_data=f"position_{pid}"
             ))
     
     # Add control buttons
@@ -131,6 +135,7 @@ def get_take_profit_markup(position_id: str, available_tps: List[int]) -> Option
         return None
     
     keyboard = []
+    callback_prefix = f"execute_tp_{position_id}_"
     
     # Create buttons for each TP level
     row = []
@@ -141,10 +146,9 @@ def get_take_profit_markup(position_id: str, available_tps: List[int]) -> Option
             row = []
         
         # Create button for TP level
-        button_text = f"TP{tp_level}"
         row.append(InlineKeyboardButton(
-            button_text, 
-            callback_data=f"execute_tp_{position_id}_{tp_level}"
+            f"TP{tp_level}", 
+            callback_data=f"{callback_prefix}{tp_level}"
         ))
     
     # Add remaining buttons
@@ -159,6 +163,7 @@ def get_take_profit_markup(position_id: str, available_tps: List[int]) -> Option
     return InlineKeyboardMarkup(keyboard)
 
 
+@functools.lru_cache(maxsize=512)
 def get_confirmation_markup(
     action: str, 
     entity_id: str, 
@@ -5,26 +5,181 @@ Notification system for the Telegram bot.
 
 This module handles sending notifications to users when important events occur.
 """
+import asyncio
+import functools
 import logging
+import time
+from collections import OrderedDict, defaultdict
 from enum import Enum
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple, Union
 from decimal import Decimal
 
 # Updated import for ParseMode to work with python-telegram-bot v20+
-from telegram.constants import ParseMode
+from telegram.constants import MessageLimit, ParseMode
 
 from ..core.position import Position
+from .telegram_users import CHAT_ID_TO_USE, get_all_users, get_admin_users
 
-# Add imports for chart capture
-import os
-from ..core.config import ENABLE_CHART_SNAPSHOTS, SEND_CHART_ON_NEW_POSITION
-from .chart_capture import capture_chart_screenshot
+# Chart capture itself (Playwright) is imported on first use in _deliver_position_opened
+from ..core.config import (
+    ENABLE_CHART_SNAPSHOTS,
+    SEND_CHART_ON_NEW_POSITION,
+    NOTIFICATION_DEBOUNCE_SECONDS,
+)
 
 logger = logging.getLogger(__name__)
 
+# Shared Decimal constants for PnL percentages (immutable, so safe to reuse)
+_D0 = Decimal('0')
+_HUNDRED = Decimal('100')
 
-class NotificationType(Enum):
+# Message templates, rendered with str.format_map over a per-call values dict.
+# Decimal fields are formatted as-is: the C decimal module formats them faster
+# than a float() conversion plus float formatting, and without rounding drift.
+POSITION_OPENED_TPL = (
+    "🟢 <b>Position Opened</b>\n\n"
+    "<b>Asset:</b> {symbol}\n"
+    "<b>Direction:</b> {direction}\n"
+    "<b>Quantity:</b> {initial_quantity}\n"
+    "<b>Entry Price:</b> {entry_price}\n"
+    "<b>Value:</b> {value:.6f}\n"
+    "<b>Strategy:</b> {strategy}_{settings}\n"
+    "<b>Timeframe:</b> {timeframe}\n"
+    "<b>ID:</b> <code>{id}</code>"
+)
+TAKE_PROFIT_TPL = (
+    "💰 <b>Take Profit Executed</b>\n\n"
+    "<b>Asset:</b> {symbol}\n"
+    "<b>Direction:</b> {direction}\n"
+    "<b>TP Level:</b> {tp_level}\n"
+    "<b>Quantity:</b> {quantity:.6f}\n"
+    "<b>Price:</b> {price:.6f}\n"
+    "<b>Profit:</b> {profit:.6f} ({profit_percentage:.2f}%)\n"
+    "<b>Strategy:</b> {strategy}_{settings}\n"
+    "<b>Remaining:</b> {remaining:.6f}\n"
+    "<b>ID:</b> <code>{id}</code>{closed_suffix}"
+)
+TAKE_PROFIT_CLOSED_SUFFIX = "\n\n✅ <b>Position fully closed!</b>"
+POSITION_CLOSED_TPL = (
+    "🟡 <b>Position Closed</b>\n\n"
+    "<b>Asset:</b> {symbol}\n"
+    "<b>Direction:</b> {direction}\n"
+    "<b>Initial Quantity:</b> {initial_quantity}\n"
+    "<b>Entry Price:</b> {entry_price}\n"
+    "<b>Realized PnL:</b> {pnl_icon} {pnl_sign}{pnl:.6f} ({pnl_percentage:.2f}%)\n"
+    "<b>Strategy:</b> {strategy}_{settings}\n"
+    "<b>ID:</b> <code>{id}</code>{reason_line}"
+)
+STOP_LOSS_TPL = (
+    "🔴 <b>Stop Loss Triggered</b>\n\n"
+    "<b>Asset:</b> {symbol}\n"
+    "<b>Direction:</b> {direction}\n"
+    "<b>Entry Price:</b> {entry_price}\n"
+    "<b>Current Price:</b> {current_price:.6f}\n"
+    "<b>Loss:</b> {loss_percentage:.2f}%\n"
+    "<b>Strategy:</b> {strategy}_{settings}\n"
+    "<b>ID:</b> <code>{id}</code>\n\n"
+    "Position will be closed automatically."
+)
+
+
+def _position_values(position: Position) -> Dict[str, Any]:
+    """
+    Collect the template fields shared by every position notification.
+    
+    The fields are fixed once a position is opened, so they are built on the
+    first notification and cached on the position (as _render_ctx) for its
+    later take-profit, stop-loss and close notifications.
+    
+    Args:
+        position: The position being reported
+        
+    Returns:
+        New dict of template field values, safe for the caller to extend
+    """
+    ctx = getattr(position, "_render_ctx", None)
+    if ctx is None:
+        ctx = {
+            "symbol": position.asset.symbol,
+            "direction": position.direction.value,
+            "strategy": position.bot_strategy,
+            "settings": position.bot_settings,
+            "id": position.id,
+            "timeframe": position.timeframe,
+            "entry_price": f"{position.entry_price:.6f}",
+            "initial_quantity": f"{position.initial_quantity:.6f}",
+        }
+        position._render_ctx = ctx
+    return dict(ctx)
+
+
+# Most recent notifications remembered for duplicate suppression
+RECENT_NOTIFICATIONS_MAX_ENTRIES = 256
+
+# Notifications for one chat arriving within this window are sent
+# as one message, joined by NOTIFICATION_SEPARATOR
+NOTIFICATION_COALESCE_DELAY = 0.5  # seconds
+NOTIFICATION_SEPARATOR = "\n\n―\n\n"
+
+# How long close() waits for background sends (e.g. a position-opened
+# notification still capturing its chart) before cancelling them
+NOTIFICATION_CLOSE_TIMEOUT = 30.0  # seconds
+
+def _join_messages(messages: List[str]) -> List[str]:
+    """
+    Join queued messages into as few texts as fit Telegram's message limit.
+    
+    Args:
+        messages: Complete HTML messages, in send order
+        
+    Returns:
+        Texts to send; a message that is too long on its own is kept as is
+    """
+    texts: List[str] = []
+    current = ""
+    for message in messages:
+        candidate = f"{current}{NOTIFICATION_SEPARATOR}{message}" if current else message
+        if current and len(candidate) > MessageLimit.MAX_TEXT_LENGTH:
+            texts.append(current)
+            current = message
+        else:
+            current = candidate
+    if current:
+        texts.append(current)
+    return texts
+
+
+def _safe_notify(label: str) -> Callable:
+    """
+    Decorator factory that logs, rather than raises, errors from a notification method.
+    
+    Notifications must never break the trading code that triggers them.
+    
+    Args:
+        label: Log message prefix, e.g. "Error sending take profit notification"
+        
+    Returns:
+        Decorator for async NotificationManager methods
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            try:
+                return await func(self, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"{label}: {str(e)}", exc_info=True)
+        
+        return wrapper
+    
+    return decorator
+
+
+class NotificationType(str, Enum):
     """Types of notifications."""
+    # Format as the plain value (e.g. "take_profit") in f-strings and logs
+    __str__ = str.__str__
+    __format__ = str.__format__
+    
     POSITION_OPENED = "position_opened"
     TAKE_PROFIT = "take_profit"
     POSITION_CLOSED = "position_closed"
@@ -46,7 +201,17 @@ class NotificationManager:
             telegram_bot: Telegram bot instance
         """
         self.telegram_bot = telegram_bot
+        # Strong references to in-flight background sends so they aren't GC'd
+        self._bg_tasks: Set[asyncio.Task] = set()
+        # Last send time of recent notifications, keyed by (direct_chat_id, admin_only, message)
+        self._recent: "OrderedDict[Tuple[Optional[str], bool, str], float]" = OrderedDict()
+        # Messages waiting to be coalesced per chat, and the task that will send them
+        self._pending: Dict[Union[str, int], List[str]] = defaultdict(list)
+        self._flush_task: Optional[asyncio.Task] = None
+        # Set by close(); later notifications are sent at once, not queued
+        self._closing = False
     
+    @_safe_notify("Error sending position opened notification")
     async def notify_position_opened(
         self, 
         position: Position, 
@@ -63,80 +228,108 @@ class NotificationManager:
             admin_only: Whether to send to admin users only
             direct_chat_id: Optional direct chat ID to send to
         """
-        try:
-            # Format the notification message
-            message = (
-                f"🟢 <b>Position Opened</b>\n\n"
-                f"<b>Asset:</b> {position.asset.symbol}\n"
-                f"<b>Direction:</b> {position.direction.value}\n"
-                f"<b>Quantity:</b> {position.initial_quantity:.6f}\n"
-                f"<b>Entry Price:</b> {position.entry_price:.6f}\n"
-                f"<b>Value:</b> {position.initial_value:.6f}\n"
-                f"<b>Strategy:</b> {position.bot_strategy}_{position.bot_settings}\n"
-                f"<b>Timeframe:</b> {position.timeframe}\n"
-                f"<b>ID:</b> <code>{position.id}</code>"
+        # Format the notification message
+        values = _position_values(position)
+        values["value"] = position.initial_value
+        message = POSITION_OPENED_TPL.format_map(values)
+        
+        if ENABLE_CHART_SNAPSHOTS and SEND_CHART_ON_NEW_POSITION:
+            # Chart capture takes seconds; deliver in the background so the
+            # caller (trade execution) is not held up
+            task = asyncio.create_task(
+                self._deliver_position_opened(position, message, admin_only, direct_chat_id)
             )
-            
-            # Send the main notification text
-            if direct_chat_id:
-                success = await self.telegram_bot.send_message(
-                    chat_id=direct_chat_id,
-                    text=message,
+            self._bg_tasks.add(task)
+            task.add_done_callback(self._bg_tasks.discard)
+        else:
+            await self._deliver_position_opened(position, message, admin_only, direct_chat_id)
+    
+    @_safe_notify("Error sending position opened notification")
+    async def _deliver_position_opened(
+        self,
+        position: Position,
+        message: str,
+        admin_only: bool,
+        direct_chat_id: Optional[str]
+    ) -> None:
+        """
+        Send a position opened notification, with its chart snapshot if enabled.
+        
+        Args:
+            position: The opened position
+            message: Formatted notification message
+            admin_only: Whether to send to admin users only
+            direct_chat_id: Optional direct chat ID to send to
+        """
+        # Checked once here, so a repeat costs no chart capture and the sends
+        # below skip the check
+        if self._is_duplicate((direct_chat_id, admin_only, message)):
+            logger.info(f"Skipping duplicate {NotificationType.POSITION_OPENED} notification")
+            return
+        
+        # Capture the chart first so it can carry the message as its caption;
+        # it goes to the direct chat ID if provided, else the configured user.
+        # Without either, the text is broadcast to users and no chart is sent
+        target_chat_id = direct_chat_id or CHAT_ID_TO_USE
+        photo_bytes = None
+        if ENABLE_CHART_SNAPSHOTS and SEND_CHART_ON_NEW_POSITION:
+            if target_chat_id:
+                from .chart_capture import get_chart_image
+                
+                # Shares /chart's image cache, so a burst of opens on one
+                # symbol costs a single browser capture
+                logger.info(f"Capturing chart snapshot for new position: {position.id}")
+                symbol = position.asset.symbol
+                photo_bytes = await get_chart_image(f"BINANCE:{symbol}", symbol)
+                if not photo_bytes:
+                    logger.warning(f"Failed to capture chart screenshot for new position: {position.id}")
+            else:
+                logger.warning("Could not determine target chat ID for chart snapshot.")
+        
+        # One request when the whole message fits in a photo caption
+        # (the HTML length overestimates Telegram's post-parse count, so this is safe)
+        if photo_bytes and target_chat_id and len(message) <= MessageLimit.CAPTION_LENGTH:
+            try:
+                await self.telegram_bot.application.bot.send_photo(
+                    chat_id=target_chat_id,
+                    photo=photo_bytes,
+                    caption=message,
                     parse_mode=ParseMode.HTML
                 )
-                logger.info(f"Direct notification to {direct_chat_id} success: {success}")
-            else:
-                await self._send_notification(
-                    message=message,
-                    notification_type=NotificationType.POSITION_OPENED,
-                    admin_only=admin_only
+                logger.info(f"Sent position opened notification with chart to {target_chat_id}")
+                return
+            except Exception as photo_err:
+                logger.error(
+                    f"Failed to send chart notification for {position.id}, sending text and chart separately: {photo_err}",
+                    exc_info=True
                 )
+        
+        # Send the main notification text, honouring admin_only and the users
+        # broadcast; with a chart to follow it is not coalesced, so it is
+        # delivered before the chart below
+        await self._send_notification(
+            message=message,
+            notification_type=NotificationType.POSITION_OPENED,
+            admin_only=admin_only,
+            direct_chat_id=direct_chat_id,
+            coalesce=not photo_bytes,
+            dedupe=False
+        )
 
-            # Send chart snapshot if enabled
-            if ENABLE_CHART_SNAPSHOTS and SEND_CHART_ON_NEW_POSITION:
-                logger.info(f"Sending chart snapshot for new position: {position.id}")
-                screenshot_path = await capture_chart_screenshot(position.asset.symbol, position.timeframe)
-                
-                if screenshot_path:
-                    try:
-                        # Determine chat ID to send photo to
-                        target_chat_id = direct_chat_id
-                        if not target_chat_id:
-                            from .telegram_users import CHAT_ID_TO_USE # Get configured chat ID
-                            target_chat_id = CHAT_ID_TO_USE
-                            # If still no target, might need to broadcast to all admins/users?
-                            # For now, let's stick to the main configured user or direct if provided
-
-                        if target_chat_id:
-                            await self.telegram_bot.application.bot.send_photo(
-                                chat_id=target_chat_id,
-                                photo=open(screenshot_path, 'rb'),
-                                caption=f"Chart for {position.asset.symbol} ({position.timeframe}) at position open",
-                                parse_mode=ParseMode.HTML
-                            )
-                            logger.info(f"Sent chart snapshot to {target_chat_id}")
-                        else:
-                            logger.warning("Could not determine target chat ID for chart snapshot.")
-
-                    except Exception as photo_err:
-                        logger.error(f"Failed to send chart snapshot for {position.id}: {photo_err}", exc_info=True)
-                    finally:
-                        # Clean up the temporary screenshot file
-                        if os.path.exists(screenshot_path):
-                             try:
-                                os.remove(screenshot_path)
-                                # Remove temp directory if it's empty (optional)
-                                temp_dir = os.path.dirname(screenshot_path)
-                                if not os.listdir(temp_dir):
-                                    os.rmdir(temp_dir)
-                             except OSError as e:
-                                logger.warning(f"Error removing temporary file/dir {screenshot_path}: {e}")
-                else:
-                    logger.warning(f"Failed to capture chart screenshot for new position: {position.id}")
-            
-        except Exception as e:
-            logger.error(f"Error sending position opened notification: {str(e)}", exc_info=True)
+        # Send the chart snapshot on its own
+        if photo_bytes:
+            try:
+                await self.telegram_bot.application.bot.send_photo(
+                    chat_id=target_chat_id,
+                    photo=photo_bytes,
+                    caption=f"Chart for {position.asset.symbol} ({position.timeframe}) at position open",
+                    parse_mode=ParseMode.HTML
+                )
+                logger.info(f"Sent chart snapshot to {target_chat_id}")
+            except Exception as photo_err:
+                logger.error(f"Failed to send chart snapshot for {position.id}: {photo_err}", exc_info=True)
     
+    @_safe_notify("Error sending take profit notification")
     async def notify_take_profit(
         self, 
         position: Position, 
@@ -159,49 +352,33 @@ class NotificationManager:
             admin_only: Whether to send to admin users only
             direct_chat_id: Optional direct chat ID to send to
         """
-        try:
-            # Calculate profit
-            profit = (price - position.entry_price) * quantity if position.direction.value == "LONG" else (position.entry_price - price) * quantity
-            profit_percentage = (profit / (position.entry_price * quantity)) * Decimal("100")
-            
-            # Format the notification message
-            message = (
-                f"💰 <b>Take Profit Executed</b>\n\n"
-                f"<b>Asset:</b> {position.asset.symbol}\n"
-                f"<b>Direction:</b> {position.direction.value}\n"
-                f"<b>TP Level:</b> {tp_level}\n"
-                f"<b>Quantity:</b> {quantity:.6f}\n"
-                f"<b>Price:</b> {price:.6f}\n"
-                f"<b>Profit:</b> {profit:.6f} ({profit_percentage:.2f}%)\n"
-                f"<b>Strategy:</b> {position.bot_strategy}_{position.bot_settings}\n"
-                f"<b>Remaining:</b> {position.remaining_quantity:.6f}\n"
-                f"<b>ID:</b> <code>{position.id}</code>"
-            )
-            
-            # Add closed notification if this is the final TP
-            if position.is_closed:
-                message += "\n\n✅ <b>Position fully closed!</b>"
-            
-            # Send to users
-            if direct_chat_id:
-                # Send directly to specified chat ID
-                success = await self.telegram_bot.send_message(
-                    chat_id=direct_chat_id,
-                    text=message,
-                    parse_mode=ParseMode.HTML
-                )
-                logger.info(f"Direct TP notification to {direct_chat_id} success: {success}")
-            else:
-                # Use regular notification method
-                await self._send_notification(
-                    message=message,
-                    notification_type=NotificationType.TAKE_PROFIT,
-                    admin_only=admin_only
-                )
-            
-        except Exception as e:
-            logger.error(f"Error sending take profit notification: {str(e)}", exc_info=True)
+        # Calculate profit
+        entry_price = position.entry_price
+        cost = entry_price * quantity
+        profit = (price - entry_price) * quantity if position.direction.value == "LONG" else (entry_price - price) * quantity
+        profit_percentage = (profit / cost) * _HUNDRED
+        
+        # Format the notification message
+        values = _position_values(position)
+        values["tp_level"] = tp_level
+        values["quantity"] = quantity
+        values["price"] = price
+        values["profit"] = profit
+        values["profit_percentage"] = profit_percentage
+        values["remaining"] = position.remaining_quantity
+        # Add closed notification if this is the final TP
+        values["closed_suffix"] = TAKE_PROFIT_CLOSED_SUFFIX if position.is_closed else ""
+        message = TAKE_PROFIT_TPL.format_map(values)
+        
+        # Send to the direct chat ID if provided, else to users
+        await self._send_notification(
+            message=message,
+            notification_type=NotificationType.TAKE_PROFIT,
+            admin_only=admin_only,
+            direct_chat_id=direct_chat_id
+        )
     
+    @_safe_notify("Error sending position closed notification")
     async def notify_position_closed(
         self, 
         position: Position, 
@@ -220,54 +397,32 @@ class NotificationManager:
             admin_only: Whether to send to admin users only
             direct_chat_id: Optional direct chat ID to send to
         """
-        try:
-            # Calculate realized PnL
-            realized_pnl = position.get_realized_pnl()
-            initial_value = position.entry_price * position.initial_quantity
-            pnl_percentage = (realized_pnl / initial_value) * Decimal("100") if initial_value > 0 else Decimal("0")
-            
-            # Format PnL with color and symbol
-            if realized_pnl >= 0:
-                pnl_str = f"🟢 +{realized_pnl:.6f} ({pnl_percentage:.2f}%)"
-            else:
-                pnl_str = f"🔴 {realized_pnl:.6f} ({pnl_percentage:.2f}%)"
-            
-            # Format the notification message
-            message = (
-                f"🟡 <b>Position Closed</b>\n\n"
-                f"<b>Asset:</b> {position.asset.symbol}\n"
-                f"<b>Direction:</b> {position.direction.value}\n"
-                f"<b>Initial Quantity:</b> {position.initial_quantity:.6f}\n"
-                f"<b>Entry Price:</b> {position.entry_price:.6f}\n"
-                f"<b>Realized PnL:</b> {pnl_str}\n"
-                f"<b>Strategy:</b> {position.bot_strategy}_{position.bot_settings}\n"
-                f"<b>ID:</b> <code>{position.id}</code>"
-            )
-            
-            # Add reason if provided
-            if reason:
-                message += f"\n<b>Reason:</b> {reason}"
-            
-            # Send to users
-            if direct_chat_id:
-                # Send directly to specified chat ID
-                success = await self.telegram_bot.send_message(
-                    chat_id=direct_chat_id,
-                    text=message,
-                    parse_mode=ParseMode.HTML
-                )
-                logger.info(f"Direct close notification to {direct_chat_id} success: {success}")
-            else:
-                # Use regular notification method
-                await self._send_notification(
-                    message=message,
-                    notification_type=NotificationType.POSITION_CLOSED,
-                    admin_only=admin_only
-                )
-            
-        except Exception as e:
-            logger.error(f"Error sending position closed notification: {str(e)}", exc_info=True)
+        # Calculate realized PnL
+        realized_pnl = position.get_realized_pnl()
+        initial_value = position.entry_price * position.initial_quantity
+        pnl_percentage = (realized_pnl / initial_value) * _HUNDRED if initial_value > 0 else _D0
+        
+        # Format the notification message, PnL with color and symbol
+        values = _position_values(position)
+        values["pnl"] = realized_pnl
+        values["pnl_percentage"] = pnl_percentage
+        if realized_pnl >= 0:
+            values["pnl_icon"], values["pnl_sign"] = "🟢", "+"
+        else:
+            values["pnl_icon"], values["pnl_sign"] = "🔴", ""
+        # Add reason if provided
+        values["reason_line"] = f"\n<b>Reason:</b> {reason}" if reason else ""
+        message = POSITION_CLOSED_TPL.format_map(values)
+        
+        # Send to the direct chat ID if provided, else to users
+        await self._send_notification(
+            message=message,
+            notification_type=NotificationType.POSITION_CLOSED,
+            admin_only=admin_only,
+            direct_chat_id=direct_chat_id
+        )
     
+    @_safe_notify("Error sending stop loss notification")
     async def notify_stop_loss(
         self, 
         position: Position, 
@@ -286,40 +441,21 @@ class NotificationManager:
             admin_only: Whether to send to admin users only
             direct_chat_id: Optional direct chat ID to send to
         """
-        try:
-            # Format the notification message
-            message = (
-                f"🔴 <b>Stop Loss Triggered</b>\n\n"
-                f"<b>Asset:</b> {position.asset.symbol}\n"
-                f"<b>Direction:</b> {position.direction.value}\n"
-                f"<b>Entry Price:</b> {position.entry_price:.6f}\n"
-                f"<b>Current Price:</b> {current_price:.6f}\n"
-                f"<b>Loss:</b> {loss_percentage:.2f}%\n"
-                f"<b>Strategy:</b> {position.bot_strategy}_{position.bot_settings}\n"
-                f"<b>ID:</b> <code>{position.id}</code>\n\n"
-                f"Position will be closed automatically."
-            )
-            
-            # Send to users
-            if direct_chat_id:
-                # Send directly to specified chat ID
-                success = await self.telegram_bot.send_message(
-                    chat_id=direct_chat_id,
-                    text=message,
-                    parse_mode=ParseMode.HTML
-                )
-                logger.info(f"Direct stop loss notification to {direct_chat_id} success: {success}")
-            else:
-                # Use regular notification method
-                await self._send_notification(
-                    message=message,
-                    notification_type=NotificationType.STOP_LOSS,
-                    admin_only=admin_only
-                )
-            
-        except Exception as e:
-            logger.error(f"Error sending stop loss notification: {str(e)}", exc_info=True)
+        # Format the notification message
+        values = _position_values(position)
+        values["current_price"] = current_price
+        values["loss_percentage"] = loss_percentage
+        message = STOP_LOSS_TPL.format_map(values)
+        
+        # Send to the direct chat ID if provided, else to users
+        await self._send_notification(
+            message=message,
+            notification_type=NotificationType.STOP_LOSS,
+            admin_only=admin_only,
+            direct_chat_id=direct_chat_id
+        )
     
+    @_safe_notify("Error sending error notification")
     async def notify_error(
         self, 
         error_message: str, 
@@ -334,26 +470,24 @@ class NotificationManager:
             details: Additional error details
             admin_only: Whether to send to admin users only
         """
-        try:
-            # Format the notification message
-            message = f"❌ <b>Error</b>\n\n{error_message}"
-            
-            # Add details if provided
-            if details:
-                message += "\n\n<b>Details:</b>\n"
-                for key, value in details.items():
-                    message += f"<b>{key}:</b> {value}\n"
-            
-            # Send to users (only admins by default)
-            await self._send_notification(
-                message=message,
-                notification_type=NotificationType.ERROR,
-                admin_only=admin_only
-            )
-            
-        except Exception as e:
-            logger.error(f"Error sending error notification: {str(e)}", exc_info=True)
+        # Format the notification message
+        parts = [f"❌ <b>Error</b>\n\n{error_message}"]
+        
+        # Add details if provided
+        if details:
+            parts.append("\n\n<b>Details:</b>\n")
+            for key, value in details.items():
+                parts.append(f"<b>{key}:</b> {value}\n")
+        message = "".join(parts)
+        
+        # Send to users (only admins by default)
+        await self._send_notification(
+            message=message,
+            notification_type=NotificationType.ERROR,
+            admin_only=admin_only
+        )
     
+    @_safe_notify("Error sending system notification")
     async def notify_system(
         self, 
         title: str, 
@@ -368,25 +502,25 @@ class NotificationManager:
             message: Notification message
             admin_only: Whether to send to admin users only
         """
-        try:
-            # Format the notification message
-            formatted_message = f"ℹ️ <b>{title}</b>\n\n{message}"
-            
-            # Send to users
-            await self._send_notification(
-                message=formatted_message,
-                notification_type=NotificationType.SYSTEM,
-                admin_only=admin_only
-            )
-            
-        except Exception as e:
-            logger.error(f"Error sending system notification: {str(e)}", exc_info=True)
+        # Format the notification message
+        formatted_message = f"ℹ️ <b>{title}</b>\n\n{message}"
+        
+        # Send to users
+        await self._send_notification(
+            message=formatted_message,
+            notification_type=NotificationType.SYSTEM,
+            admin_only=admin_only
+        )
     
+    @_safe_notify("Error sending notification")
     async def _send_notification(
         self, 
         message: str, 
         notification_type: NotificationType,
-        admin_only: bool = False
+        admin_only: bool = False,
+        direct_chat_id: Optional[str] = None,
+        coalesce: bool = True,
+        dedupe: bool = True
     ) -> None:
         """
         Send a notification to users based on their preferences.
@@ -395,50 +529,148 @@ class NotificationManager:
             message: Notification message
             notification_type: Type of notification
             admin_only: Whether to send to admin users only
+            direct_chat_id: Optional chat ID to send to instead of the users
+            coalesce: Whether a message to a single chat may wait to be
+                merged with others; pass False when it must go out before a
+                follow-up send
+            dedupe: Whether to skip the message if it was sent recently; pass
+                False when the caller has already checked
         """
-        try:
-            logger.debug(f"Entering _send_notification method for {notification_type.value}")
-            
-            # Import CHAT_ID_TO_USE directly - this is our simplified approach
-            from .telegram_users import CHAT_ID_TO_USE, get_all_users, get_admin_users
-            
-            if CHAT_ID_TO_USE:
-                # Direct notification to configured user
-                logger.debug(f"Sending direct notification to {CHAT_ID_TO_USE}")
-                success = await self.telegram_bot.send_message(
-                    chat_id=CHAT_ID_TO_USE,
-                    text=message,
-                    parse_mode=ParseMode.HTML
-                )
-                logger.info(f"Sent {notification_type.value} notification to {CHAT_ID_TO_USE}. Success: {success}")
-                return
-                
-            # Fallback to getting users from helper functions if CHAT_ID_TO_USE is not set
-            # Get users to notify
-            if admin_only:
-                users = get_admin_users()
-            else:
-                users = get_all_users()
-            
-            logger.info(f"Will send {notification_type.value} notification to users: {users}")
-            
-            if not users:
-                logger.warning(f"No users found to send {notification_type.value} notification to")
-                return
-            
-            # Send the message to all users
-            logger.debug(f"About to broadcast message: {message[:50]}...")
-            results = await self.telegram_bot.broadcast_message(
+        logger.debug(f"Entering _send_notification method for {notification_type}")
+        
+        # Drop exact repeats (e.g. one event reported for correlated positions)
+        if dedupe and self._is_duplicate((direct_chat_id, admin_only, message)):
+            logger.info(f"Skipping duplicate {notification_type} notification")
+            return
+        
+        # The direct chat ID if provided, else the configured user
+        target_chat_id = direct_chat_id or CHAT_ID_TO_USE
+        
+        if target_chat_id and coalesce and not self._closing:
+            # Every notification for this chat shares it, so back-to-back
+            # ones are merged
+            self._pending[target_chat_id].append(message)
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_pending())
+                # _flush_task is cleared before the flush sends, so keep a
+                # strong reference until the task is done
+                self._bg_tasks.add(self._flush_task)
+                self._flush_task.add_done_callback(self._bg_tasks.discard)
+            logger.debug(f"Queued {notification_type} notification for {target_chat_id}")
+            return
+        
+        if target_chat_id:
+            # Send directly to the target chat
+            logger.debug(f"Sending direct notification to {target_chat_id}")
+            success = await self.telegram_bot.send_message(
+                chat_id=target_chat_id,
                 text=message,
-                users=users,
                 parse_mode=ParseMode.HTML
             )
+            logger.info(f"Sent {notification_type} notification to {target_chat_id}. Success: {success}")
+            return
             
-            # Log results
-            success_count = sum(1 for success in results.values() if success)
-            logger.info(
-                f"Sent {notification_type.value} notification to {success_count}/{len(results)} users. Results: {results}"
-            )
+        # Fallback to the user helpers only when CHAT_ID_TO_USE is not set
+        users = get_admin_users() if admin_only else get_all_users()
+        
+        logger.info(f"Will send {notification_type} notification to users: {users}")
+        
+        if not users:
+            logger.warning(f"No users found to send {notification_type} notification to")
+            return
+        
+        # Send the message to all users
+        logger.debug(f"About to broadcast message: {message[:50]}...")
+        results = await self.telegram_bot.broadcast_message(
+            text=message,
+            users=users,
+            parse_mode=ParseMode.HTML
+        )
+        
+        # Log results
+        success_count = sum(results.values())
+        logger.info(
+            f"Sent {notification_type} notification to {success_count}/{len(results)} users. Results: {results}"
+        )
+    
+    @_safe_notify("Error sending notification")
+    async def _flush_pending(self) -> None:
+        """
+        Send the notifications queued during the coalescing window, one message per chat.
+        """
+        await asyncio.sleep(NOTIFICATION_COALESCE_DELAY)
+        
+        # Swap the queue out, then clear the task, so notifications arriving
+        # while we send start a new window; _bg_tasks keeps this task alive
+        pending, self._pending = self._pending, defaultdict(list)
+        self._flush_task = None
+        await self._send_pending(pending)
+    
+    async def _send_pending(self, pending: Dict[Union[str, int], List[str]]) -> None:
+        """
+        Send queued notifications, as few messages per chat as fit.
+        
+        Args:
+            pending: Queued messages per chat, in send order
+        """
+        for chat_id, messages in pending.items():
+            for text in _join_messages(messages):
+                success = await self.telegram_bot.send_message(
+                    chat_id=chat_id,
+                    text=text,
+                    parse_mode=ParseMode.HTML
+                )
+                logger.info(f"Sent {len(messages)} queued notification(s) to {chat_id}. Success: {success}")
+    
+    @_safe_notify("Error flushing notifications")
+    async def close(self, timeout: float = NOTIFICATION_CLOSE_TIMEOUT) -> None:
+        """
+        Send queued notifications and wait for in-flight background deliveries.
+        
+        Call before the bot application stops (and before the chart browser
+        closes), so nothing queued is lost and no capture is cut off.
+        
+        Args:
+            timeout: Seconds to wait for background deliveries before cancelling them
+        """
+        self._closing = True
+        
+        # A flush task that is still set is waiting out the coalescing delay
+        # and has not taken the queue yet, so send the queue here instead
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        pending, self._pending = self._pending, defaultdict(list)
+        await self._send_pending(pending)
+        
+        if self._bg_tasks:
+            logger.info(f"Waiting for {len(self._bg_tasks)} background notification(s)")
+            _, not_done = await asyncio.wait(set(self._bg_tasks), timeout=timeout)
+            if not_done:
+                logger.warning(f"Cancelling {len(not_done)} background notification(s) still running after {timeout}s")
+                for task in not_done:
+                    task.cancel()
+                await asyncio.gather(*not_done, return_exceptions=True)
+    
+    def _is_duplicate(self, key: Tuple[Optional[str], bool, str]) -> bool:
+        """
+        Check whether a notification was already sent within the debounce window.
+        
+        Records the send time when it was not, so concurrent repeats are caught.
+        
+        Args:
+            key: (direct_chat_id, admin_only, message) identifying the notification
             
-        except Exception as e:
-            logger.error(f"Error sending notification: {str(e)}", exc_info=True)
\ No newline at end of file
+        Returns:
+            True if the notification should be skipped
+        """
+        now = time.monotonic()
+        last_sent = self._recent.get(key)
+        if last_sent is not None and now - last_sent < NOTIFICATION_DEBOUNCE_SECONDS:
+            return True
+        
+        self._recent[key] = now
+        self._recent.move_to_end(key)
+        while len(self._recent) > RECENT_NOTIFICATIONS_MAX_ENTRIES:
+            self._recent.popitem(last=False)
+        return False
\ No newline at end of file
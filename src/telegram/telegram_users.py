@@ -8,7 +8,7 @@ This module provides the necessary configuration and decorators for Telegram bot
 import os
 import logging
 import functools
-from typing import Callable, Any, List, Union
+from typing import Callable, Any, FrozenSet, Tuple, Union
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -34,9 +34,13 @@ else:
     CHAT_ID_TO_USE = None
 
 
-# Simple dictionary to track authentication
-AUTHORIZED_USERS = {CHAT_ID_TO_USE: True} if CHAT_ID_TO_USE else {}
-ADMIN_USERS = {CHAT_ID_TO_USE: True} if CHAT_ID_TO_USE else {}
+# Authorized chat IDs, fixed at import; user management is done via config
+AUTHORIZED_USERS: FrozenSet[str] = frozenset({str(CHAT_ID_TO_USE)}) if CHAT_ID_TO_USE else frozenset()
+ADMIN_USERS: FrozenSet[str] = frozenset({str(CHAT_ID_TO_USE)}) if CHAT_ID_TO_USE else frozenset()
+
+# Immutable snapshots handed out by get_all_users()/get_admin_users()
+_ALL_USERS_CACHE: Tuple[str, ...] = tuple(AUTHORIZED_USERS)
+_ADMIN_USERS_CACHE: Tuple[str, ...] = tuple(ADMIN_USERS)
 
 
 def check_auth(func: Callable) -> Callable:
@@ -88,14 +92,14 @@ def admin_only(func: Callable) -> Callable:
 
 
 # Helper functions to simulate the UserManager interface
-def get_all_users() -> List[str]:
-    """Get a list of all authorized user chat IDs."""
-    return list(AUTHORIZED_USERS.keys())
+def get_all_users() -> Tuple[str, ...]:
+    """Get all authorized user chat IDs."""
+    return _ALL_USERS_CACHE
 
 
-def get_admin_users() -> List[str]:
-    """Get a list of admin user chat IDs."""
-    return list(ADMIN_USERS.keys())
+def get_admin_users() -> Tuple[str, ...]:
+    """Get admin user chat IDs."""
+    return _ADMIN_USERS_CACHE
 
 
 def is_authorized(chat_id: Union[int, str]) -> bool: